@@ -0,0 +1,59 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.management.base import BaseCommand
+
+from api.serializers import post_rows, serialize_post
+from posts.bench import bench_database, make_posts, measure
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def model_dict(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'image': post.image.url if post.image else None,
+    }
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает стоимость сериализации страницы API: '
+            'django.core.serializers, словари из моделей и '
+            'values_list с ручной сериализацией (во временной БД).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            author = User.objects.create(username='bench')
+            group = Group.objects.create(title='bench', slug='bench')
+            make_posts(options['posts'], author, group)
+            count = options['posts']
+            posts = Post.objects.select_related('author', 'group')
+
+            def core_serializers():
+                serializers.serialize('json', posts[:count],
+                                      use_natural_foreign_keys=True)
+
+            def models():
+                json.dumps([model_dict(post) for post in posts[:count]],
+                           ensure_ascii=False)
+
+            def rows():
+                json.dumps([serialize_post(row)
+                            for row in post_rows(Post.objects.all())[:count]],
+                           ensure_ascii=False)
+
+            for name, func in (('serializers', core_serializers),
+                               ('models', models), ('values_list', rows)):
+                seconds = measure(func, options['repeat'])
+                self.stdout.write(
+                    f'{name:<12}: {seconds * 1000:8.2f} ms на {count} постов')
@@ -0,0 +1,35 @@
+"""Ручная сериализация постов в JSON-совместимые словари.
+
+Посты читаются не моделями, а кортежами values_list(named=True):
+без создания экземпляров Post и без форм/сериализаторов на объект.
+"""
+from django.core.files.storage import default_storage
+
+POST_FIELDS = ('pk', 'text', 'pub_date', 'image', 'author__username',
+               'group__slug')
+
+
+def post_rows(queryset):
+    return queryset.values_list(*POST_FIELDS, named=True)
+
+
+def serialize_post(row):
+    return {
+        'id': row.pk,
+        'text': row.text,
+        'pub_date': row.pub_date.isoformat(),
+        'author': row.author__username,
+        'group': row.group__slug,
+        'image': default_storage.url(row.image) if row.image else None,
+    }
+
+
+def serialize_page(page, path):
+    def link(cursor):
+        return f'{path}?cursor={cursor}' if cursor else None
+
+    return {
+        'results': [serialize_post(row) for row in page],
+        'next': link(page.next_cursor),
+        'previous': link(page.previous_cursor),
+    }
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='Описание')
+        for number in range(settings.COUNT_POST + 3):
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {number}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_return_json_pages(self):
+        urls = (
+            reverse('api:posts'),
+            reverse('api:group', args=[self.group.slug]),
+            reverse('api:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.guest_client.get(url).json()
+                self.assertEqual(len(data['results']), settings.COUNT_POST)
+                self.assertEqual(data['results'][0], {
+                    'id': Post.objects.latest('pub_date', 'pk').pk,
+                    'text': f'Пост {settings.COUNT_POST + 2}',
+                    'pub_date': data['results'][0]['pub_date'],
+                    'author': 'author',
+                    'group': 'api-group',
+                    'image': None,
+                })
+                self.assertIsNone(data['previous'])
+                rest = self.guest_client.get(data['next']).json()
+                self.assertEqual(len(rest['results']), 3)
+                self.assertIsNone(rest['next'])
+
+    def test_follow_feed(self):
+        response = self.guest_client.get(reverse('api:follow'))
+        self.assertEqual(response.status_code, 401)
+        data = self.reader_client.get(reverse('api:follow')).json()
+        self.assertEqual(len(data['results']), settings.COUNT_POST)
+
+    def test_unknown_group_is_json_404(self):
+        response = self.guest_client.get(reverse('api:group', args=['none']))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('detail', response.json())
+
+    def test_etag_not_modified(self):
+        url = reverse('api:group', args=[self.group.slug])
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, group=self.group,
+                            text='Новый пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from posts.caching import (
+    author_scope, feed_etag, follow_feed_scopes, group_scope, index_scope)
+from posts.feed import FeedPaginator, get_follow_feed
+from posts.follows import following_ids
+from posts.groups import get_group
+from posts.models import Post
+from posts.utils import CursorPaginator
+
+from .serializers import post_rows, serialize_page
+
+User = get_user_model()
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def page_response(request, paginator):
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+    return json_response(serialize_page(page, request.path))
+
+
+def not_found():
+    return json_response({'detail': 'Не найдено.'}, status=404)
+
+
+@require_safe
+@condition(etag_func=feed_etag('api:posts', lambda request: [index_scope()]))
+def posts(request):
+    return page_response(request, CursorPaginator(
+        post_rows(Post.objects.all()), settings.COUNT_POST))
+
+
+@require_safe
+@condition(etag_func=feed_etag(
+    'api:group', lambda request, slug: [group_scope(slug)]))
+def group_posts(request, slug):
+    group = get_group(slug)
+    if group is None:
+        return not_found()
+    return page_response(request, CursorPaginator(
+        post_rows(group.posts.all()), settings.COUNT_POST))
+
+
+@require_safe
+@condition(etag_func=feed_etag(
+    'api:profile', lambda request, username: [author_scope(username)]))
+def profile(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return not_found()
+    return page_response(request, CursorPaginator(
+        post_rows(author.posts.all()), settings.COUNT_POST))
+
+
+def follow(request):
+    if not request.user.is_authenticated:
+        return json_response(
+            {'detail': 'Требуется авторизация.'}, status=401)
+    return follow_feed(request)
+
+
+@require_safe
+@condition(etag_func=feed_etag(
+    'api:follow', lambda request: follow_feed_scopes(
+        request.user.pk, following_ids(request))))
+def follow_feed(request):
+    return page_response(request, FeedPaginator(
+        request.user, post_rows(get_follow_feed(request.user)),
+        settings.COUNT_POST))
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'state', 'attempts', 'created',
+                    'finished')
+    list_filter = ('state', 'name')
+
+
+admin.site.register(Job, JobAdmin)
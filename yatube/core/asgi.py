@@ -0,0 +1,159 @@
+"""ASGI-обёртка над WSGI-приложением Django.
+
+Django 2.2 не умеет ни ASGI, ни async-view, поэтому AsgiHandler
+принимает соединения в цикле событий ASGI-сервера, а каждый запрос
+целиком — от middleware до последнего куска потокового ответа —
+выполняет в одном потоке ограниченного пула (ASGI_THREADS). Один
+поток на запрос нужен потому, что соединения с БД у Django свои
+в каждом потоке. Куски ответа поток складывает в ограниченную
+очередь (ASGI_BUFFER_CHUNKS), а клиенту их отдаёт корутина в цикле
+событий: медленный клиент держит поток, только пока отстаёт больше
+чем на буфер, — обычный ответ из одного куска поток не задерживает.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+def build_environ(scope, body):
+    """WSGI environ по HTTP scope и файлу с телом запроса."""
+    server = scope.get('server') or ('localhost', 80)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    # В ASGI path полный, в WSGI PATH_INFO — без префикса SCRIPT_NAME.
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode().decode('latin1'),
+        'PATH_INFO': path.encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin1')
+        if key in environ:
+            value = f'{environ[key]},{value}'
+        environ[key] = value
+    return environ
+
+
+async def read_body(receive):
+    """Тело запроса; большое уходит во временный файл, а не в память."""
+    body = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            body.close()
+            return None
+        body.write(message.get('body', b''))
+        if not message.get('more_body'):
+            body.seek(0)
+            return body
+
+
+class AsgiHandler:
+    def __init__(self, wsgi_application, max_workers=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+        body = await read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(settings.ASGI_BUFFER_CHUNKS)
+
+        def send_sync(message):
+            # Ждёт, только если очередь полна.
+            asyncio.run_coroutine_threadsafe(
+                queue.put(message), loop).result()
+
+        sender = asyncio.ensure_future(self.send_queued(queue, send))
+        try:
+            with body:
+                await loop.run_in_executor(
+                    self.executor, self.run, build_environ(scope, body),
+                    send_sync)
+        finally:
+            await queue.put(None)
+            await sender
+
+    async def send_queued(self, queue, send):
+        """Отдаёт клиенту сообщения из очереди до None. Если клиент
+        отвалился, очередь всё равно вычитывается, иначе поток повиснет
+        на полной очереди."""
+        error = None
+        while True:
+            message = await queue.get()
+            if message is None:
+                break
+            if error is None:
+                try:
+                    await send(message)
+                except Exception as exc:
+                    error = exc
+        if error is not None:
+            raise error
+
+    def run(self, environ, send):
+        """WSGI-вызов в потоке пула; куски ответа уходят по мере готовности."""
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            start['status'] = int(status.split(' ', 1)[0])
+            start['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers]
+
+        chunks = self.wsgi_application(environ, start_response)
+        try:
+            send({'type': 'http.response.start', **start})
+            for chunk in chunks:
+                if chunk:
+                    send({'type': 'http.response.body', 'body': chunk,
+                          'more_body': True})
+            send({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,6 @@
+from core.backends.sqlite3 import base
+from core.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+from core.sqlite import write_lock
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с очередью писателей (core.sqlite, SQLITE_TUNING).
+
+    Транзакция начинается с BEGIN IMMEDIATE под write_lock процесса
+    и держит его до COMMIT или ROLLBACK. Писатели процесса идут по
+    одному, а писатель другого процесса ждёт блокировку в SQLite до
+    busy_timeout. «database is locked» при попытке дописать
+    в транзакцию, начатую чтением, так не возникает, и повторять
+    запрос целиком не нужно.
+    """
+
+    holds_write_lock = False
+
+    def _start_transaction_under_autocommit(self):
+        if not settings.SQLITE_TUNING:
+            return super()._start_transaction_under_autocommit()
+        write_lock.acquire()
+        self.holds_write_lock = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self.release_write_lock()
+            raise
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            write_lock.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.release_write_lock()
@@ -0,0 +1,172 @@
+"""Двухуровневый кеш и защита от «набегов» на пустой ключ.
+
+L1 — LRU в памяти процесса (LocMemCache) с коротким временем жизни,
+L2 — общий для всех воркеров кеш из CACHES (файловый, Redis или
+LocMemCache как локальная замена). Запись идёт в оба уровня, чтение —
+сначала из L1. Ключи с префиксами из LOCAL_SKIP_PREFIXES (поколения,
+блокировки) читаются только из L2, чтобы воркеры не расходились.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.dispatch import Signal
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+
+# Единственный хук метрик кеша: шлётся на каждое обращение
+# get_or_compute (страницы, фрагменты) и на lookup() других кешей;
+# name — какой кеш, без ключа.
+cache_lookup = Signal(providing_args=['name', 'hit'])
+# Попадания и промахи этого процесса по именам кешей; += у Counter
+# не атомарен, а lookup() вызывают из потоков пула.
+lookups = Counter()
+lookups_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self.skip_prefixes = tuple(options.get(
+            'LOCAL_SKIP_PREFIXES', ('generation:', 'lock:')))
+        self.local = LocMemCache(location or 'tiered-local', {
+            'TIMEOUT': options.get('LOCAL_TIMEOUT', 5),
+            'OPTIONS': {
+                'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000)},
+        })
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return not key.startswith(self.skip_prefixes)
+
+    def local_timeout(self, timeout):
+        if timeout is None or timeout is DEFAULT_TIMEOUT:
+            return self.local.default_timeout
+        return min(timeout, self.local.default_timeout)
+
+    def get(self, key, default=None, version=None):
+        if self.is_local(key):
+            value = self.local.get(key, version=version)
+            if value is not None:
+                return value
+        value = self.shared.get(key, version=version)
+        if value is None:
+            return default
+        if self.is_local(key):
+            self.local.set(key, value, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self.is_local(key):
+            self.local.set(key, value, self.local_timeout(timeout),
+                           version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and self.is_local(key):
+            self.local.set(key, value, self.local_timeout(timeout),
+                           version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        self.shared.delete(key, version=version)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        if keys:
+            local_keys = [key for key in keys if self.is_local(key)]
+            found = self.local.get_many(local_keys, version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            self.local.set_many(
+                {key: value for key, value in shared.items()
+                 if self.is_local(key)}, version=version)
+            found.update(shared)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        self.local.set_many(
+            {key: value for key, value in data.items()
+             if self.is_local(key) and key not in failed},
+            self.local_timeout(timeout), version=version)
+        return failed
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+def lookup(name, hit, sender=None):
+    """Сообщает о попадании или промахе кеша name."""
+    with lookups_lock:
+        lookups[name, 'hit' if hit else 'miss'] += 1
+    cache_lookup.send(sender=sender, name=name, hit=hit)
+
+
+def hit_ratios():
+    """Попадания, промахи и доля попаданий по кешам этого процесса."""
+    with lookups_lock:
+        counts = dict(lookups)
+    ratios = {}
+    for name in sorted({name for name, _ in counts}):
+        hits = counts.get((name, 'hit'), 0)
+        misses = counts.get((name, 'miss'), 0)
+        ratios[name] = {'hits': hits, 'misses': misses,
+                        'ratio': round(hits / (hits + misses), 4)}
+    return ratios
+
+
+def get_or_compute(cache, key, compute, timeout=DEFAULT_TIMEOUT,
+                   cacheable=None, name=None):
+    """Значение из кеша или compute() — но только в одном процессе.
+
+    Пока первый запрос вычисляет значение под блокировкой, остальные
+    ждут до LOCK_WAIT секунд, а не считают то же самое параллельно.
+    Обращение уходит в cache_lookup под именем name (по умолчанию —
+    ключ). Возвращает (value, hit).
+    """
+    value = cache.get(key)
+    lookup(name or key, value is not None, cache.__class__)
+    if value is not None:
+        return value, True
+    lock_key = f'lock:{key}'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                return value, True
+        return compute(), False
+    try:
+        value = compute()
+        if cacheable is None or cacheable(value):
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value, False
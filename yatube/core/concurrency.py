@@ -0,0 +1,64 @@
+"""Независимые чтения одного запроса — параллельно.
+
+gather(*calls) выполняет вызовы без аргументов одновременно: первый —
+в потоке запроса, остальные — в ограниченном пуле (FETCH_THREADS).
+У каждого потока пула своё соединение с БД, как у потока запроса;
+после вызова оно закрывается по тем же правилам, что в конце запроса
+(CONN_MAX_AGE). Режим чтения с реплик (core.db) передаётся в поток.
+
+Внутри транзакции вызовы идут по очереди: соединения других потоков
+не видят её незакоммиченных данных. То же при выключенном
+CONCURRENT_FETCHES.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from . import db
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                settings.FETCH_THREADS, thread_name_prefix='fetch')
+        return executor
+
+
+def in_transaction():
+    return any(connection.in_atomic_block
+               for connection in connections.all())
+
+
+def run_in_thread(call, replicas):
+    close_old_connections()
+    try:
+        with db.reads_from(replicas):
+            return call()
+    finally:
+        close_old_connections()
+
+
+def gather(*calls):
+    """Результаты calls в том же порядке; исключение первого упавшего
+    вызова (по порядку) пробрасывается."""
+    if (len(calls) < 2 or not settings.CONCURRENT_FETCHES
+            or in_transaction()):
+        return [call() for call in calls]
+    replicas = getattr(db.state, 'replicas', False)
+    pool = get_executor()
+    futures = [pool.submit(run_in_thread, call, replicas)
+               for call in calls[1:]]
+    try:
+        first = calls[0]()
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return [first] + [future.result() for future in futures]
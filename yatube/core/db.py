@@ -0,0 +1,81 @@
+"""Чтение с реплик БД.
+
+ReplicaRouter отправляет на реплики (DATABASE_REPLICAS) только чтения
+внутри view, обёрнутых replica_reads, — лент и страницы поста; записи
+и все остальные чтения идут на основную БД. Пользователь, который
+только что что-то записал, REPLICA_PIN_SECONDS читает с основной,
+чтобы видеть свои изменения: PrimaryPinMiddleware замечает запись
+в запросе и ставит cookie.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+PIN_COOKIE = 'pin_primary'
+
+state = threading.local()
+
+
+@contextmanager
+def reads_from(replicas):
+    previous = getattr(state, 'replicas', False)
+    state.replicas = replicas
+    try:
+        yield
+    finally:
+        state.replicas = previous
+
+
+def is_pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def replica_reads(unless=None):
+    """Чтения view — с реплик, если пользователь не закреплён за основной
+    БД и unless(request, ...) не говорит, что реплика может отставать."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.DATABASE_REPLICAS or is_pinned(request)
+                    or unless and unless(request, *args, **kwargs)):
+                return view(request, *args, **kwargs)
+            with reads_from(replicas=True):
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if getattr(state, 'replicas', False):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        return None
+
+
+class PrimaryPinMiddleware:
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state.wrote = False
+        response = self.get_response(request)
+        if state.wrote:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, f'{time.time() + seconds:.3f}',
+                                max_age=seconds, httponly=True,
+                                samesite='Lax')
+        return response
@@ -0,0 +1,36 @@
+"""Публичные оболочки страниц для кеширования на фронт-прокси.
+
+При EDGE_CACHE_ENABLED view, обёрнутые edge_shell, рендерятся для
+всех как для гостя: пользовательские куски страницы ({% esi %}:
+меню, кнопка подписки, форма комментария) заменяются тегами
+<esi:include>, и прокси подставляет их из отдельных адресов.
+Оболочка не читает сессию и не ставит cookie, поэтому ответ один на
+всех и получает Cache-Control: public, s-maxage=EDGE_CACHE_TIMEOUT.
+Смена поколения лент прокси не сбрасывает: свежесть оболочки
+ограничена s-maxage, а повторная проверка по ETag стоит 304.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_cache_control
+
+
+def is_shell(request):
+    return getattr(request, 'edge_shell', False)
+
+
+def edge_shell(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.EDGE_CACHE_ENABLED
+                or request.method not in ('GET', 'HEAD')):
+            return view(request, *args, **kwargs)
+        request.user = AnonymousUser()
+        request.edge_shell = True
+        response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304) and not response.cookies:
+            patch_cache_control(response, public=True, max_age=0,
+                                s_maxage=settings.EDGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,96 @@
+import asyncio
+import io
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import AsgiHandler, build_environ
+from core.profiling import PERCENTILES, percentile
+from posts.management.commands.bench_views import Command as BenchViews
+
+VIEWS = ('posts:index', 'posts:group_list', 'posts:profile',
+         'posts:post_detail')
+
+
+def http_scope(path):
+    return {'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': b'', 'headers': [], 'http_version': '1.1'}
+
+
+def summary(latencies, elapsed):
+    latencies = sorted(seconds * 1000 for seconds in latencies)
+    return ', '.join(
+        [f'rps {len(latencies) / elapsed:8.1f}']
+        + [f'p{p} {percentile(latencies, p):7.2f} ms' for p in PERCENTILES])
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает WSGI и yatube.asgi при одинаковом числе рабочих '
+            'потоков: параллельные клиенты запрашивают ленты в процессе, '
+            'без сети. Данные — как для bench_views (generate_data).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--clients', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        paths = [path for view_paths
+                 in BenchViews().target_paths(rng, VIEWS).values()
+                 for path in view_paths]
+        paths = [rng.choice(paths) for _ in range(options['requests'])]
+        wsgi = get_wsgi_application()
+        for name, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+            started = time.perf_counter()
+            latencies = run(wsgi, paths, options)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{name}: {summary(latencies, elapsed)}')
+
+    def run_wsgi(self, wsgi, paths, options):
+        """Клиенты ждут свободный поток из workers, как у WSGI-сервера."""
+        def call(path):
+            environ = build_environ(http_scope(path), io.BytesIO())
+            chunks = wsgi(environ, lambda status, headers: None)
+            try:
+                b''.join(chunks)
+            finally:
+                chunks.close()
+
+        with ThreadPoolExecutor(options['workers']) as workers, \
+                ThreadPoolExecutor(options['clients']) as clients:
+            def fetch(path):
+                started = time.perf_counter()
+                workers.submit(call, path).result()
+                return time.perf_counter() - started
+
+            return list(clients.map(fetch, paths))
+
+    def run_asgi(self, wsgi, paths, options):
+        app = AsgiHandler(wsgi, options['workers'])
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            pass
+
+        async def fetch(path, clients):
+            async with clients:
+                started = time.perf_counter()
+                await app(http_scope(path), receive, send)
+                return time.perf_counter() - started
+
+        async def main():
+            clients = asyncio.Semaphore(options['clients'])
+            return await asyncio.gather(
+                *(fetch(path, clients) for path in paths))
+
+        try:
+            return asyncio.run(main())
+        finally:
+            app.executor.shutdown()
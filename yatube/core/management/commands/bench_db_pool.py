@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+MODES = {
+    'connect': {'YATUBE_CONN_MAX_AGE': '0'},
+    'persistent': {'YATUBE_CONN_MAX_AGE': '600'},
+    'pool': {'YATUBE_DB_POOL': '1'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность без пула (соединение на '
+            'запрос), с постоянными соединениями CONN_MAX_AGE и с пулом '
+            'core.pool. Каждый режим — отдельный процесс bench_asgi.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--clients', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=400)
+
+    def handle(self, *args, **options):
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        for mode, env in MODES.items():
+            env = {**os.environ, 'YATUBE_DB_POOL': '', **env}
+            output = subprocess.run(
+                [sys.executable, manage, 'bench_asgi',
+                 '--workers', str(options['workers']),
+                 '--clients', str(options['clients']),
+                 '--requests', str(options['requests'])],
+                env=env, check=True, capture_output=True, text=True).stdout
+            for line in output.splitlines():
+                self.stdout.write(f'{mode:>10} {line}')
@@ -0,0 +1,113 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+
+from core.sqlite import is_locked
+from posts.bench import bench_database, make_posts
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+MODES = {
+    'plain': 'django.db.backends.sqlite3',
+    'tuned': 'core.backends.sqlite3',
+}
+
+
+class Command(BaseCommand):
+    help = ('Смешанная нагрузка на файл SQLite: читатели листают ленту, '
+            'писатели добавляют комментарии, как add_comment. Сравнивает '
+            'обычный режим и SQLITE_TUNING с бэкендом core.backends.sqlite3 '
+            '(WAL, прагмы, очередь транзакций).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--posts', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        database = connections.databases['default']
+        test_settings = database['TEST']
+        old_name, old_engine = test_settings['NAME'], database['ENGINE']
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for mode, tuning in (('plain', False), ('tuned', True)):
+                    test_settings['NAME'] = os.path.join(
+                        directory, f'{mode}.sqlite3')
+                    # Потоки нагрузки открывают соединения с этим бэкендом.
+                    database['ENGINE'] = MODES[mode]
+                    with override_settings(SQLITE_TUNING=tuning), \
+                            bench_database():
+                        reads, writes, errors = self.run(options)
+                    seconds = options['seconds']
+                    self.stdout.write(
+                        f'{mode}: чтений {reads / seconds:8.1f}/с, '
+                        f'записей {writes / seconds:7.1f}/с, '
+                        f'ошибок записи {errors}')
+        finally:
+            test_settings['NAME'] = old_name
+            database['ENGINE'] = old_engine
+
+    def run(self, options):
+        self.author = User.objects.create_user(username='bench_sqlite')
+        make_posts(options['posts'], self.author)
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+        self.stop = threading.Event()
+        self.counts = Counter()
+        self.counts_lock = threading.Lock()
+        # Соединение этого потока держит файл открытым; у потоков
+        # нагрузки свои.
+        connection.close()
+        threads = ([threading.Thread(target=self.worker, args=(self.read,))
+                    for _ in range(options['readers'])]
+                   + [threading.Thread(target=self.worker,
+                                       args=(self.write, seed))
+                      for seed in range(options['writers'])])
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        return (self.counts['reads'], self.counts['writes'],
+                self.counts['errors'])
+
+    def count(self, name):
+        with self.counts_lock:
+            self.counts[name] += 1
+
+    def worker(self, target, *args):
+        try:
+            target(*args)
+        finally:
+            connection.close()
+
+    def read(self):
+        while not self.stop.is_set():
+            list(Post.objects.select_related('author', 'group')[:10])
+            self.count('reads')
+
+    def add_comment(self, rng):
+        post = Post.objects.get(pk=rng.choice(self.post_ids))
+        Comment.objects.create(post=post, author=self.author, text='bench')
+
+    def write(self, seed):
+        rng = random.Random(seed)
+        while not self.stop.is_set():
+            try:
+                with transaction.atomic():
+                    self.add_comment(rng)
+                self.count('writes')
+            except OperationalError as exc:
+                if not is_locked(exc):
+                    raise
+                self.count('errors')
@@ -0,0 +1,64 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import (
+    HISTOGRAM_BUCKETS, PERCENTILES, histogram, percentile, read_samples)
+
+METRICS = (
+    ('total_ms', 'время, мс'),
+    ('db_ms', 'БД, мс'),
+    ('queries', 'запросов'),
+    ('template_ms', 'шаблоны, мс'),
+    ('peak_memory', 'память, Б'),
+)
+BAR_WIDTH = 40
+
+
+class Command(BaseCommand):
+    help = ('Сводка ProfilingMiddleware по view: p50/p95/p99 метрик '
+            'и гистограмма времени ответа.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=getattr(
+            settings, 'PROFILING_LOG', None))
+        parser.add_argument('--view', help='Только этот view.')
+        parser.add_argument('--no-histogram', action='store_true')
+
+    def handle(self, *args, **options):
+        path = options['log']
+        if not path or not os.path.exists(path):
+            raise CommandError(f'Нет лога профилирования: {path}')
+        by_view = read_samples(path)
+        if options['view']:
+            by_view = {options['view']: by_view.get(options['view'], [])}
+        for view, records in sorted(by_view.items()):
+            self.stdout.write(f'{view} ({len(records)} запросов)')
+            header = ''.join(f'{f"p{p}":>12}' for p in PERCENTILES)
+            self.stdout.write(f'  {"":<14}{header}')
+            for field, label in METRICS:
+                values = sorted(record[field] for record in records
+                                if record.get(field) is not None)
+                if not values:
+                    continue
+                row = ''.join(f'{percentile(values, p):>12g}'
+                              for p in PERCENTILES)
+                self.stdout.write(f'  {label:<14}{row}')
+            hits = sum(record['cache_hits'] for record in records)
+            misses = sum(record['cache_misses'] for record in records)
+            self.stdout.write(f'  кеш: попаданий {hits}, промахов {misses}')
+            if not options['no_histogram']:
+                self.write_histogram(
+                    [record['total_ms'] for record in records])
+
+    def write_histogram(self, values):
+        counts = histogram(values)
+        scale = BAR_WIDTH / max(max(counts), 1)
+        labels = [f'<= {bound} мс' for bound in HISTOGRAM_BUCKETS]
+        labels.append(f'> {HISTOGRAM_BUCKETS[-1]} мс')
+        for label, count in zip(labels, counts):
+            if count:
+                self.stdout.write(
+                    f'  {label:>11} {"#" * max(round(count * scale), 1)} '
+                    f'{count}')
@@ -0,0 +1,44 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+
+def work(batch_size, poll_interval, once):
+    # Соединения родителя не годятся в дочернем процессе.
+    connections.close_all()
+    tasks.work(batch_size, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди core.tasks в нескольких '
+            'процессах. Нужен при TASKS_EAGER=False (YATUBE_TASKS=queue).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда очередь опустеет.')
+
+    def handle(self, *args, **options):
+        arguments = (options['batch_size'], options['poll_interval'],
+                     options['once'])
+        if options['processes'] == 1:
+            tasks.work(*arguments)
+            return
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=work, args=arguments)
+                     for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Глубина очереди фоновых задач и их задержка по именам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=3600,
+                            help='За сколько секунд считать задержку.')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        stats = queue_stats(options['window'])
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+        for name, item in sorted(stats.items()):
+            latency = ', '.join(f'{p} {value:.1f} ms'
+                                for p, value in item['latency_ms'].items())
+            self.stdout.write(
+                f'{name:<20} в очереди {item["pending"]:>6} '
+                f'(старейшая {item["oldest_pending_s"] or 0:.1f} с), '
+                f'выполняется {item["running"]}, '
+                f'не удалось {item["failed"]}; '
+                f'задержка: {latency or "-"}')
@@ -0,0 +1,72 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача core.tasks: имя обработчика и его аргументы."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не удалась'),
+    )
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Задача')
+    args = models.TextField(
+        default='{}',
+        verbose_name='Аргументы (JSON)')
+    key = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        verbose_name='Ключ идемпотентности')
+    state = models.CharField(
+        max_length=10,
+        choices=STATES,
+        default=PENDING,
+        verbose_name='Состояние')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток')
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Не раньше')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлена')
+    started = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начата')
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершена')
+    worker = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Метка выборки воркера')
+    error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'run_at', 'id']),
+            models.Index(fields=['worker']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'], condition=Q(key__isnull=False),
+                name='core_job_unique_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.state})'
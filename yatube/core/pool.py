@@ -0,0 +1,213 @@
+"""Пул соединений с БД для бэкендов core.backends.pooled_*.
+
+Django по умолчанию открывает соединение на каждый запрос и закрывает
+его в конце (CONN_MAX_AGE=0). Бэкенд с пулом вместо открытия берёт
+готовое соединение из пула, а вместо закрытия возвращает его туда,
+откатив незавершённую транзакцию. Пул общий для всех потоков процесса
+(WSGI-воркеры, пул yatube.asgi) и настраивается ключом POOL
+в DATABASES:
+
+MIN_SIZE — сколько соединений не закрывается по простою;
+MAX_SIZE — больше соединений не открывается, лишние потоки ждут;
+TIMEOUT — сколько секунд ждать свободного соединения;
+MAX_IDLE — через сколько секунд простоя соединение закрывается;
+HEALTH_CHECK_AFTER — после скольких секунд простоя соединение перед
+выдачей проверяется запросом SELECT 1.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5.0,
+    'MAX_IDLE': 300.0,
+    'HEALTH_CHECK_AFTER': 30.0,
+}
+
+pools = {}
+pools_lock = threading.Lock()
+# Пулы, унаследованные при fork: их соединения принадлежат родителю,
+# и закрывать их (в том числе сборщиком мусора) в потомке нельзя.
+inherited = []
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+def close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+def is_healthy(raw):
+    try:
+        cursor = raw.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+    except Exception:
+        return False
+    return True
+
+
+class ConnectionPool:
+    def __init__(self, min_size, max_size, timeout, max_idle,
+                 health_check_after):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        # Свободные соединения и время возврата; новые — справа.
+        self.idle = deque()
+        self.size = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.created = 0
+        self.evicted = 0
+        self.discarded = 0
+        self.timeouts = 0
+        self.health_check_failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @classmethod
+    def from_settings(cls, options):
+        options = {**DEFAULTS, **options}
+        return cls(options['MIN_SIZE'], options['MAX_SIZE'],
+                   options['TIMEOUT'], options['MAX_IDLE'],
+                   options['HEALTH_CHECK_AFTER'])
+
+    def checkout(self, connect):
+        """Свободное соединение из пула или новое через connect()."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        raw = None
+        with self.condition:
+            while True:
+                self.evict_idle()
+                if self.idle:
+                    raw, returned = self.idle.pop()
+                    break
+                if self.size < self.max_size:
+                    self.size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'Нет свободного соединения за {self.timeout} с '
+                        f'(занято {self.in_use} из {self.max_size})')
+                self.condition.wait(remaining)
+            waited = time.monotonic() - started
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.checkouts += 1
+            self.in_use += 1
+        if (raw is not None
+                and time.monotonic() - returned > self.health_check_after
+                and not is_healthy(raw)):
+            close_quietly(raw)
+            with self.condition:
+                self.health_check_failures += 1
+                self.discarded += 1
+            raw = None
+        if raw is None:
+            try:
+                raw = connect()
+            except Exception:
+                with self.condition:
+                    self.size -= 1
+                    self.in_use -= 1
+                    self.condition.notify()
+                raise
+            with self.condition:
+                self.created += 1
+        return raw
+
+    def checkin(self, raw):
+        """Возвращает соединение; сломанное закрывается."""
+        try:
+            raw.rollback()
+            reusable = True
+        except Exception:
+            reusable = False
+        with self.condition:
+            self.in_use -= 1
+            if reusable:
+                self.idle.append((raw, time.monotonic()))
+            else:
+                self.size -= 1
+                self.discarded += 1
+            self.condition.notify()
+        if not reusable:
+            close_quietly(raw)
+
+    def evict_idle(self):
+        """Закрывает давно простаивающие соединения сверх MIN_SIZE."""
+        now = time.monotonic()
+        while (self.idle and self.size > self.min_size
+               and now - self.idle[0][1] > self.max_idle):
+            raw, _ = self.idle.popleft()
+            self.size -= 1
+            self.evicted += 1
+            close_quietly(raw)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'evicted': self.evicted,
+                'discarded': self.discarded,
+                'timeouts': self.timeouts,
+                'health_check_failures': self.health_check_failures,
+                'wait_ms_total': round(self.wait_total * 1000, 3),
+                'wait_ms_max': round(self.wait_max * 1000, 3),
+            }
+
+
+def get_pool(alias, options):
+    with pools_lock:
+        pool = pools.get(alias)
+        if pool is not None and pool.pid != os.getpid():
+            inherited.append(pools.pop(alias))
+            pool = None
+        if pool is None:
+            pool = pools[alias] = ConnectionPool.from_settings(options)
+        return pool
+
+
+def all_stats():
+    return {alias: pool.stats() for alias, pool in pools.items()
+            if pool.pid == os.getpid()}
+
+
+class PooledDatabaseWrapperMixin:
+    """Подмешивается к DatabaseWrapper бэкенда Django."""
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        return self.pool.checkout(
+            lambda: super(PooledDatabaseWrapperMixin,
+                          self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.checkin(self.connection)
@@ -0,0 +1,191 @@
+"""Профилирование запросов по именам view.
+
+ProfilingMiddleware включается настройкой PROFILING_ENABLED и для
+каждого запроса собирает число SQL-запросов и время в БД, время
+рендеринга шаблонов, попадания и промахи кеша (core.cache.cache_lookup)
+и пик выделенной памяти. Итоги уходят в заголовок Server-Timing
+и строкой JSON в PROFILING_LOG; отчёт с перцентилями по view строит
+manage.py profiling_report. Пик памяти меряет tracemalloc, только если
+включён PROFILING_TRACE_MEMORY: трассировка замедляет каждое выделение
+памяти, а пик берётся по всему процессу и под несколькими потоками
+приблизителен.
+"""
+import json
+import math
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+from .cache import cache_lookup
+
+UNRESOLVED = '<unresolved>'
+PERCENTILES = (50, 95, 99)
+# Верхние границы корзин гистограммы времени ответа, мс.
+HISTOGRAM_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+local = threading.local()
+log_lock = threading.Lock()
+
+
+class Sample:
+    """Метрики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.peak_memory = None
+        self.total_time = 0.0
+
+    def server_timing(self):
+        parts = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hit {self.cache_hits} miss {self.cache_misses}"',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ]
+        if self.peak_memory is not None:
+            parts.append(f'mem;desc="peak {self.peak_memory} B"')
+        return ', '.join(parts)
+
+    def as_dict(self, view):
+        return {
+            'view': view,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'template_ms': round(self.template_time * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'peak_memory': self.peak_memory,
+            'total_ms': round(self.total_time * 1000, 3),
+        }
+
+
+def current_sample():
+    return getattr(local, 'sample', None)
+
+
+def count_query(execute, sql, params, many, context):
+    sample = current_sample()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if sample is not None:
+            sample.queries += 1
+            sample.db_time += time.perf_counter() - started
+
+
+def count_cache_lookup(sender, name, hit, **kwargs):
+    sample = current_sample()
+    if sample is None:
+        return
+    if hit:
+        sample.cache_hits += 1
+    else:
+        sample.cache_misses += 1
+
+
+def timed_render(render):
+    """Обёртка Template.render: время верхнего шаблона страницы.
+
+    Вложенные {% include %} рендерятся внутри него и уже учтены;
+    запросы, выполненные при рендеринге, входят и во время БД.
+    """
+    def wrapper(self, *args, **kwargs):
+        sample = current_sample()
+        if sample is None or getattr(local, 'rendering', False):
+            return render(self, *args, **kwargs)
+        local.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            sample.template_time += time.perf_counter() - started
+            local.rendering = False
+    wrapper.profiled = True
+    return wrapper
+
+
+def install_hooks():
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = timed_render(Template.render)
+    cache_lookup.connect(count_cache_lookup,
+                         dispatch_uid='core.profiling.cache_lookup')
+
+
+def write_sample(record):
+    path = getattr(settings, 'PROFILING_LOG', None)
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with log_lock, open(path, 'a', encoding='utf-8') as log:
+        log.write(line)
+
+
+def percentile(values, p):
+    """Перцентиль p по методу ближайшего ранга; values отсортированы."""
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def histogram(values):
+    """Число значений в каждой корзине HISTOGRAM_BUCKETS и сверх них."""
+    counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+    for value in values:
+        index = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS)
+                      if value <= bound), len(HISTOGRAM_BUCKETS))
+        counts[index] += 1
+    return counts
+
+
+def read_samples(path):
+    """Записи лога, сгруппированные по view."""
+    by_view = {}
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            record = json.loads(line)
+            by_view.setdefault(record['view'], []).append(record)
+    return by_view
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.trace_memory = getattr(settings, 'PROFILING_TRACE_MEMORY', False)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        install_hooks()
+
+    def __call__(self, request):
+        sample = local.sample = Sample()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(count_query))
+                response = self.get_response(request)
+        finally:
+            local.sample = None
+        sample.total_time = time.perf_counter() - started
+        if self.trace_memory:
+            sample.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        response['Server-Timing'] = sample.server_timing()
+        write_sample(sample.as_dict(view))
+        return response
@@ -0,0 +1,75 @@
+"""Режим SQLite для рабочих шардов (SQLITE_TUNING).
+
+При каждом соединении с SQLite выставляются SQLITE_PRAGMAS: WAL
+(читатели не ждут писателя), synchronous=NORMAL, mmap и кеш страниц,
+busy_timeout. Писатель в SQLite всегда один: бэкенд
+core.backends.sqlite3 начинает транзакции с BEGIN IMMEDIATE под
+write_lock, так что писатели процесса выстраиваются в очередь, а
+писатели других процессов (воркеры задач, соседние воркеры сервера)
+ждут блокировку в SQLite до busy_timeout. Повторяется только работа
+с БД, переданная в run_serialized, но не view: загруженные файлы
+и сброшенный кеш повтором не откатить.
+
+Частые записи из сигналов и задач (счётчики, раскладка по лентам)
+обёрнуты в serialized. Одиночный save() в autocommit — один оператор:
+он не апгрейдит читающую транзакцию и просто ждёт busy_timeout.
+"""
+import random
+import threading
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Очередь писателей процесса; RLock — транзакции бывают в разных БД.
+write_lock = threading.RLock()
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(exc):
+    return isinstance(exc, OperationalError) and 'locked' in str(exc)
+
+
+def run_serialized(func, using=DEFAULT_DB_ALIAS):
+    """Выполняет func в транзакции под write_lock; если БД занята
+    дольше busy_timeout, повторяет до SQLITE_WRITE_RETRIES раз.
+
+    func должна только работать с БД: при повторе всё, что она
+    сделала вне транзакции (файлы, кеш), выполнится ещё раз.
+    """
+    if transaction.get_connection(using).in_atomic_block:
+        # Повтор не откатит внешнюю транзакцию: просто встаём в очередь.
+        with write_lock:
+            return func()
+    delay = settings.SQLITE_WRITE_BACKOFF
+    for attempt in range(settings.SQLITE_WRITE_RETRIES + 1):
+        try:
+            with write_lock, transaction.atomic(using):
+                return func()
+        except OperationalError as exc:
+            if not is_locked(exc) or attempt == settings.SQLITE_WRITE_RETRIES:
+                raise
+        time.sleep(delay * random.uniform(0.5, 1.5))
+        delay *= 2
+
+
+def serialized(func):
+    """Декоратор записи вне явного atomic(): при SQLITE_TUNING вызов
+    идёт через run_serialized, иначе — как есть."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not settings.SQLITE_TUNING:
+            return func(*args, **kwargs)
+        return run_serialized(partial(func, *args, **kwargs))
+    return wrapper
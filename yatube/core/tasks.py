@@ -0,0 +1,216 @@
+"""Очередь фоновых задач в БД.
+
+Побочные эффекты записи (раскладка по лентам, индексация и т. п.)
+регистрируются декоратором @task и ставятся в очередь enqueue():
+строка Job пишется в той же транзакции, что и сами данные, поэтому
+задача видна воркеру только после фиксации. manage.py run_worker
+забирает задачи пачками, вызывает обработчики и повторяет упавшие
+с растущей задержкой. У задачи может быть ключ идемпотентности:
+повторная постановка с тем же ключом игнорируется, пока выполненная
+задача не удалена из таблицы (TASKS_KEEP_DONE). Задачи с batch=True
+из одной выборки обрабатываются одним вызовом, одинаковые аргументы
+склеиваются.
+
+При TASKS_EAGER (по умолчанию — разработка и тесты) обработчик
+вызывается сразу в enqueue(), как если бы код стоял в самом view.
+"""
+import json
+import logging
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import Job
+from .profiling import PERCENTILES, percentile
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class LostJobs(Exception):
+    pass
+
+
+class Task:
+    def __init__(self, name, func, batch, max_attempts):
+        self.name = name
+        self.func = func
+        self.batch = batch
+        self.max_attempts = max_attempts
+
+    def run(self, arguments):
+        """Вызов обработчика для списка аргументов задач."""
+        if self.batch:
+            self.func(arguments)
+        else:
+            for kwargs in arguments:
+                self.func(**kwargs)
+
+
+def task(name, batch=False, max_attempts=None):
+    """Регистрирует обработчик; func.enqueue(key=..., **kwargs) ставит
+    задачу в очередь. Обработчик batch-задачи получает список kwargs."""
+    def decorator(func):
+        registry[name] = Task(
+            name, func, batch,
+            max_attempts or settings.TASKS_MAX_ATTEMPTS)
+        func.enqueue = lambda key=None, **kwargs: enqueue(
+            name, key=key, **kwargs)
+        return func
+    return decorator
+
+
+def enqueue(name, key=None, **kwargs):
+    spec = registry[name]
+    if settings.TASKS_EAGER:
+        spec.run([kwargs])
+        return
+    Job.objects.bulk_create(
+        [Job(name=name, key=key, args=json.dumps(kwargs, sort_keys=True))],
+        ignore_conflicts=True)
+
+
+def claim(batch_size):
+    """Забирает до batch_size готовых задач; второй воркер, выбравший
+    те же строки, при UPDATE их уже не получит."""
+    now = timezone.now()
+    ids = list(Job.objects
+               .filter(state=Job.PENDING, run_at__lte=now)
+               .order_by('run_at', 'id')
+               .values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    Job.objects.filter(pk__in=ids, state=Job.PENDING).update(
+        state=Job.RUNNING, worker=token, started=now,
+        attempts=F('attempts') + 1)
+    return list(Job.objects.filter(worker=token, state=Job.RUNNING)
+                .order_by('id'))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def owned(jobs):
+    """Строки задач, которые всё ещё выполняет этот воркер: зависшую
+    задачу requeue_stale мог отдать другому."""
+    return Job.objects.filter(
+        pk__in=[job.pk for job in jobs], state=Job.RUNNING,
+        worker=jobs[0].worker)
+
+
+def finish(jobs):
+    """Отмечает задачи выполненными; возвращает, сколько удалось."""
+    return owned(jobs).update(
+        state=Job.DONE, finished=timezone.now(), error='')
+
+
+def fail(jobs, error, max_attempts):
+    now = timezone.now()
+    for job in jobs:
+        if job.attempts >= max_attempts:
+            changes = {'state': Job.FAILED, 'finished': now}
+            logger.error('Задача %s не удалась: %s', job, error)
+        else:
+            changes = {'state': Job.PENDING,
+                       'run_at': now + retry_delay(job.attempts)}
+        owned([job]).update(error=error, **changes)
+
+
+def unique_arguments(jobs):
+    arguments = {}
+    for job in jobs:
+        arguments.setdefault(job.args, json.loads(job.args))
+    return list(arguments.values())
+
+
+def run_jobs(jobs):
+    """Выполняет выбранные задачи; каждая единица — в своей транзакции."""
+    by_name = defaultdict(list)
+    for job in jobs:
+        by_name[job.name].append(job)
+    for name, group in by_name.items():
+        spec = registry.get(name)
+        if spec is None:
+            fail(group, f'Неизвестная задача {name!r}', 0)
+            continue
+        units = [group] if spec.batch else [[job] for job in group]
+        for unit in units:
+            try:
+                with transaction.atomic():
+                    spec.run(unique_arguments(unit))
+                    # Отметка — в той же транзакции: если задачу уже
+                    # отдали другому воркеру, наш результат откатится.
+                    if finish(unit) < len(unit):
+                        raise LostJobs
+            except LostJobs:
+                logger.warning('Задачи %s забрал другой воркер, '
+                               'результат отменён', unit)
+            except Exception:
+                fail(unit, traceback.format_exc(), spec.max_attempts)
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи воркеров, умерших посреди работы."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASKS_TIMEOUT)
+    return Job.objects.filter(
+        state=Job.RUNNING, started__lt=deadline).update(
+        state=Job.PENDING, worker='')
+
+
+def purge_done():
+    deadline = timezone.now() - timedelta(seconds=settings.TASKS_KEEP_DONE)
+    return Job.objects.filter(
+        state=Job.DONE, finished__lt=deadline).delete()[0]
+
+
+def work(batch_size, poll_interval, once=False):
+    """Цикл воркера; once — выйти, как только очередь опустеет."""
+    while True:
+        requeue_stale()
+        jobs = claim(batch_size)
+        if jobs:
+            run_jobs(jobs)
+            continue
+        purge_done()
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+def queue_stats(window=3600):
+    """Глубина очереди и задержка задач (от постановки до завершения)
+    за последние window секунд, по именам задач."""
+    now = timezone.now()
+    stats = defaultdict(lambda: {
+        'pending': 0, 'running': 0, 'failed': 0, 'done': 0,
+        'oldest_pending_s': None, 'latency_ms': {}})
+    counts = (Job.objects.order_by().values('name', 'state')
+              .annotate(count=Count('pk'), oldest=Min('created')))
+    for row in counts:
+        item = stats[row['name']]
+        item[row['state']] = row['count']
+        if row['state'] == Job.PENDING:
+            item['oldest_pending_s'] = round(
+                (now - row['oldest']).total_seconds(), 3)
+    latencies = defaultdict(list)
+    done = (Job.objects
+            .filter(state=Job.DONE,
+                    finished__gte=now - timedelta(seconds=window))
+            .values_list('name', 'created', 'finished'))
+    for name, created, finished in done.iterator():
+        latencies[name].append((finished - created).total_seconds() * 1000)
+    for name, values in latencies.items():
+        values.sort()
+        stats[name]['latency_ms'] = {
+            f'p{p}': round(percentile(values, p), 3) for p in PERCENTILES}
+    return dict(stats)
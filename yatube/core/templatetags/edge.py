@@ -0,0 +1,41 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from core.edge import is_shell
+
+register = template.Library()
+
+
+class EsiNode(template.Node):
+    def __init__(self, nodelist, view_name, args):
+        self.nodelist = nodelist
+        self.view_name = view_name
+        self.args = args
+
+    def render(self, context):
+        if not is_shell(context.get('request')):
+            return self.nodelist.render(context)
+        url = reverse(self.view_name.resolve(context),
+                      args=[arg.resolve(context) for arg in self.args])
+        return format_html('<esi:include src="{}" />', url)
+
+
+@register.tag('esi')
+def do_esi(parser, token):
+    """{% esi <view_name> [args ...] %}...{% endesi %}
+
+    Пользовательский кусок страницы. Обычно рендерится на месте,
+    в публичной оболочке (core.edge) — тегом <esi:include> на адрес
+    view_name, который отдаёт тот же кусок отдельно.
+    """
+    nodelist = parser.parse(('endesi',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 2:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 1 argument.')
+    return EsiNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        [parser.compile_filter(token) for token in tokens[2:]])
@@ -0,0 +1,44 @@
+from django import template
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+
+from core.cache import get_or_compute
+
+register = template.Library()
+
+
+class LockedCacheNode(CacheNode):
+    """{% cache %}, который перерисовывает фрагмент только в одном
+    запросе, пока остальные ждут готового значения."""
+
+    def render(self, context):
+        expire_time = int(self.expire_time_var.resolve(context))
+        try:
+            fragment_cache = caches['template_fragments']
+        except InvalidCacheBackendError:
+            fragment_cache = caches['default']
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        cache_key = make_template_fragment_key(self.fragment_name, vary_on)
+        value, _ = get_or_compute(fragment_cache, cache_key,
+                                  lambda: self.nodelist.render(context),
+                                  expire_time, name=self.fragment_name)
+        return value
+
+
+@register.tag('lockedcache')
+def do_locked_cache(parser, token):
+    """{% lockedcache <timeout> <name> [vary_on ...] %}
+    ...{% endlockedcache %}"""
+    nodelist = parser.parse(('endlockedcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.')
+    return LockedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+        None)
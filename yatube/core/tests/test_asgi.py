@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from core.asgi import AsgiHandler, build_environ
+
+
+def call(app, path, query_string=b'', headers=()):
+    messages = []
+    requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        return requests.pop(0)
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path,
+             'query_string': query_string, 'headers': list(headers),
+             'http_version': '1.1', 'server': ('testserver', 80)}
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+class AsgiHandlerTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.app = AsgiHandler(get_wsgi_application(), max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app.executor.shutdown()
+        super().tearDownClass()
+
+    def test_response(self):
+        start, *body = call(self.app, '/about/author/',
+                            headers=[(b'accept', b'text/html')])
+        self.assertEqual(start['type'], 'http.response.start')
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'),
+                      start['headers'])
+        self.assertFalse(body[-1].get('more_body'))
+        content = b''.join(message['body'] for message in body)
+        self.assertIn('</html>', content.decode())
+
+    def test_not_found(self):
+        start, *_ = call(self.app, '/missing/', query_string=b'a=1')
+        self.assertEqual(start['status'], 404)
+
+    def test_root_path(self):
+        environ = build_environ(
+            {'method': 'GET', 'path': '/yatube/about/author/',
+             'root_path': '/yatube'}, None)
+        self.assertEqual(environ['SCRIPT_NAME'], '/yatube')
+        self.assertEqual(environ['PATH_INFO'], '/about/author/')
+
+    def test_lifespan(self):
+        incoming = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        app = AsgiHandler(get_wsgi_application(), max_workers=1)
+        asyncio.run(app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
+
+    def test_slow_client_releases_thread(self):
+        """Ответ в пределах буфера отпускает поток до отправки клиенту"""
+        produced = threading.Event()
+        received = []
+
+        def application(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            yield b'first'
+            yield b'second'
+            produced.set()
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            # Клиент не читает, пока поток не выдаст весь ответ.
+            received.append(await asyncio.to_thread(produced.wait, 5))
+
+        app = AsgiHandler(application, max_workers=1)
+        scope = {'type': 'http', 'method': 'GET', 'path': '/',
+                 'headers': []}
+        asyncio.run(app(scope, receive, send))
+        app.executor.shutdown()
+        self.assertEqual(received, [True] * 4)
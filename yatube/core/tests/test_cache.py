@@ -0,0 +1,79 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+
+from core.cache import get_or_compute
+
+
+class TestTieredCache(TestCase):
+    """Двухуровневый кеш"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_local_tier_serves_reads(self):
+        """Значение читается из L1, пока не истекло"""
+        cache.set('key', 'value')
+        caches['shared'].delete('key')
+        self.assertEqual(cache.get('key'), 'value')
+
+    def test_generations_skip_local_tier(self):
+        """Поколения всегда читаются из общего кеша"""
+        cache.set('generation:index', 'old')
+        caches['shared'].set('generation:index', 'new')
+        self.assertEqual(cache.get('generation:index'), 'new')
+
+    def test_get_or_compute(self):
+        """Значение вычисляется один раз и снимается блокировка"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'value'
+
+        self.assertEqual(get_or_compute(cache, 'key', compute),
+                         ('value', False))
+        self.assertEqual(get_or_compute(cache, 'key', compute),
+                         ('value', True))
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(cache.get('lock:key'))
+
+    def test_concurrent_callers_wait_for_one_compute(self):
+        """Пустой ключ заполняет один поток, остальные ждут его значения"""
+        calls = []
+        calls_lock = threading.Lock()
+        results = []
+        start = threading.Barrier(8)
+
+        def compute():
+            with calls_lock:
+                calls.append(1)
+            time.sleep(0.3)
+            return 'value'
+
+        def worker():
+            start.wait()
+            results.append(get_or_compute(cache, 'slow', compute)[0])
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_lock_wait_times_out(self):
+        """Не дождавшись чужого значения, вызов считает его сам"""
+        cache.add('lock:stuck', 1)
+        with mock.patch('core.cache.LOCK_WAIT', 0.1):
+            started = time.monotonic()
+            value = get_or_compute(cache, 'stuck', lambda: 'own')
+        self.assertEqual(value, ('own', False))
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        # Чужую блокировку не снимает и значение не кладёт.
+        self.assertIsNone(cache.get('stuck'))
+        self.assertEqual(cache.get('lock:stuck'), 1)
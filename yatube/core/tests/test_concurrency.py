@@ -0,0 +1,64 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core import db
+from core.concurrency import gather
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(CONCURRENT_FETCHES=True)
+class GatherTest(SimpleTestCase):
+    def test_calls_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def meet():
+            barrier.wait()
+            return threading.get_ident()
+
+        idents = gather(meet, meet, meet)
+        self.assertEqual(len(set(idents)), 3)
+        self.assertEqual(idents[0], threading.get_ident())
+
+    def test_results_in_order_and_errors_raised(self):
+        self.assertEqual(gather(lambda: 1, lambda: 2), [1, 2])
+        with self.assertRaises(ZeroDivisionError):
+            gather(lambda: 1, lambda: 1 / 0)
+
+    def test_replica_mode_passed_to_threads(self):
+        with db.reads_from(replicas=True):
+            flags = gather(lambda: db.state.replicas,
+                           lambda: db.state.replicas)
+        self.assertEqual(flags, [True, True])
+
+
+@override_settings(CONCURRENT_FETCHES=True)
+class GatherTransactionTest(TestCase):
+    def test_sequential_inside_transaction(self):
+        """Другие потоки не видят незакоммиченных данных теста"""
+        idents = gather(threading.get_ident, threading.get_ident)
+        self.assertEqual(set(idents), {threading.get_ident()})
+
+
+@override_settings(CONCURRENT_FETCHES=True)
+class ConcurrentViewsTest(TransactionTestCase):
+    """Страницы, которые читают БД из нескольких потоков"""
+
+    def test_profile_and_post_detail(self):
+        author = User.objects.create_user(username='concurrent_author')
+        post = Post.objects.create(author=author, text='параллельный пост')
+        Comment.objects.create(post=post, author=author, text='коммент')
+        response = self.client.get(
+            reverse('posts:profile', args=[author.username]))
+        self.assertContains(response, 'параллельный пост')
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, 'коммент')
+        self.assertEqual(
+            self.client.get(reverse('posts:profile',
+                                    args=['missing'])).status_code, 404)
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.db import PIN_COOKIE
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Реплика, до которой изменения основной БД не доходят, пока тест
+# не вызовет replicate(): так моделируется отставание репликации.
+LAGGING = 'lagging_replica'
+
+
+@override_settings(DATABASE_REPLICAS=[LAGGING], REPLICA_MAX_LAG=0)
+class ReplicaRoutingTest(TestCase):
+    databases = {'default', LAGGING}
+
+    @classmethod
+    def setUpClass(cls):
+        connections.databases[LAGGING] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+        connections.ensure_defaults(LAGGING)
+        connections.prepare_test_settings(LAGGING)
+        call_command('migrate', database=LAGGING, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[LAGGING].close()
+        del connections[LAGGING]
+        del connections.databases[LAGGING]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='replica_author')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def replicate(self):
+        for model in (User, Group, Post):
+            model.objects.using(LAGGING).bulk_create(
+                model.objects.exclude(
+                    pk__in=list(model.objects.using(LAGGING)
+                                .values_list('pk', flat=True))))
+
+    def test_feeds_read_replica(self):
+        Post.objects.create(author=self.author, text='ещё не на реплике')
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'ещё не на реплике')
+        self.replicate()
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'ещё не на реплике')
+
+    def test_writer_reads_primary(self):
+        response = self.author_client.post(
+            reverse('posts:post_create'), {'text': 'свой пост'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertContains(
+            self.author_client.get(reverse('posts:index')), 'свой пост')
+
+    def test_reads_dont_pin(self):
+        self.replicate()
+        response = self.client.get(reverse(
+            'posts:profile', args=[self.author.username]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_MAX_LAG=60)
+    def test_recently_changed_feed_reads_primary(self):
+        Post.objects.create(author=self.author, text='свежий пост')
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'свежий пост')
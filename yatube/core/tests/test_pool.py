@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.backends.pooled_sqlite3.base import DatabaseWrapper
+from core.pool import ConnectionPool, PoolTimeout
+
+User = get_user_model()
+
+
+def make_pool(**options):
+    return ConnectionPool.from_settings(
+        {'MIN_SIZE': 0, 'MAX_SIZE': 2, 'TIMEOUT': 0.05, **options})
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def test_checkin_reuses_connection(self):
+        pool = make_pool()
+        raw = pool.checkout(connect)
+        pool.checkin(raw)
+        self.assertIs(pool.checkout(connect), raw)
+        stats = pool.stats()
+        self.assertEqual((stats['checkouts'], stats['created']), (2, 1))
+        self.assertEqual((stats['size'], stats['in_use']), (1, 1))
+
+    def test_timeout_when_exhausted(self):
+        pool = make_pool()
+        pool.checkout(connect)
+        pool.checkout(connect)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(connect)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiter_gets_returned_connection(self):
+        pool = make_pool(MAX_SIZE=1, TIMEOUT=5)
+        raw = pool.checkout(connect)
+        timer = threading.Timer(0.05, pool.checkin, [raw])
+        timer.start()
+        self.assertIs(pool.checkout(connect), raw)
+        timer.join()
+        self.assertGreater(pool.stats()['wait_ms_max'], 0)
+
+    def test_idle_connections_evicted_above_min_size(self):
+        pool = make_pool(MIN_SIZE=1, MAX_IDLE=0)
+        first, second = pool.checkout(connect), pool.checkout(connect)
+        pool.checkin(first)
+        pool.checkin(second)
+        time.sleep(0.01)
+        self.assertIs(pool.checkout(connect), second)
+        stats = pool.stats()
+        self.assertEqual((stats['evicted'], stats['size']), (1, 1))
+
+    def test_broken_connection_replaced(self):
+        pool = make_pool(HEALTH_CHECK_AFTER=0)
+        raw = pool.checkout(connect)
+        pool.checkin(raw)
+        raw.close()
+        self.assertIsNot(pool.checkout(connect), raw)
+        stats = pool.stats()
+        self.assertEqual(stats['health_check_failures'], 1)
+        self.assertEqual((stats['size'], stats['created']), (1, 2))
+
+
+class PooledBackendTest(SimpleTestCase):
+    def test_close_returns_connection_to_pool(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper({
+                'ENGINE': 'core.backends.pooled_sqlite3',
+                'NAME': os.path.join(directory, 'pooled.sqlite3'),
+                'POOL': {'MAX_SIZE': 1}, 'CONN_MAX_AGE': 0,
+                'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False,
+                'OPTIONS': {}, 'TIME_ZONE': None,
+            }, alias='pooled_test')
+            wrapper.connect()
+            raw = wrapper.connection
+            wrapper.close()
+            wrapper.connect()
+            self.assertIs(wrapper.connection, raw)
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                self.assertEqual(cursor.fetchone(), (1,))
+            wrapper.close()
+            stats = wrapper.pool.stats()
+            self.assertEqual((stats['checkouts'], stats['created']), (2, 1))
+            self.assertEqual(stats['in_use'], 0)
+            raw.close()
+
+
+class DbPoolsViewTest(TestCase):
+    def test_staff_only(self):
+        url = reverse('core:db_pools')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user(
+            username='pool_staff', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import tracemalloc
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from core.profiling import histogram, percentile
+
+
+class TestProfiling(TestCase):
+    """Профилирование запросов"""
+
+    def setUp(self):
+        cache.clear()
+        handle, self.log = tempfile.mkstemp(suffix='.ndjson')
+        os.close(handle)
+        self.addCleanup(os.remove, self.log)
+        settings_override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_LOG=self.log)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_server_timing_and_log(self):
+        """Метрики попадают в заголовок и в лог под именем view"""
+        response = self.client.get('/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('cache;desc="hit 0 miss', response['Server-Timing'])
+        self.client.get('/')
+        with open(self.log, encoding='utf-8') as log:
+            records = [json.loads(line) for line in log]
+        self.assertEqual([record['view'] for record in records],
+                         ['posts:index', 'posts:index'])
+        self.assertGreater(records[0]['queries'], 0)
+        self.assertGreater(records[0]['template_ms'], 0)
+        self.assertEqual(records[1]['cache_hits'], 1)
+
+    def test_memory_opt_in(self):
+        """tracemalloc работает только по PROFILING_TRACE_MEMORY"""
+        self.assertNotIn('mem;', self.client.get('/')['Server-Timing'])
+        with override_settings(PROFILING_TRACE_MEMORY=True):
+            # Middleware создаётся заново только у нового клиента.
+            response = Client().get('/')
+        tracemalloc.stop()
+        self.assertIn('mem;desc="peak', response['Server-Timing'])
+
+    def test_report(self):
+        for _ in range(3):
+            self.client.get('/')
+        out = StringIO()
+        call_command('profiling_report', log=self.log, stdout=out)
+        self.assertIn('posts:index (3 запросов)', out.getvalue())
+        self.assertIn('p99', out.getvalue())
+
+    def test_percentiles(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99)],
+                         [50, 95, 99])
+        self.assertEqual(histogram([0.5, 3, 3000])[:3], [1, 0, 1])
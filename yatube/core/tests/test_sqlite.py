@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+
+from core.backends.sqlite3.base import DatabaseWrapper
+from core.sqlite import run_serialized, serialized, write_lock
+
+
+class SqliteTuningTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'tuning.sqlite3')
+
+    def connect(self):
+        wrapper = DatabaseWrapper({
+            'ENGINE': 'core.backends.sqlite3', 'NAME': self.path,
+            'CONN_MAX_AGE': 0, 'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False,
+            'OPTIONS': {}, 'TIME_ZONE': None,
+        }, alias='tuning_test')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def lock_is_free(self):
+        """Свободен ли write_lock для другого потока."""
+        free = []
+
+        def try_lock():
+            free.append(write_lock.acquire(blocking=False))
+            if free[0]:
+                write_lock.release()
+
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+        return free[0]
+
+    @override_settings(SQLITE_TUNING=True)
+    def test_pragmas_applied_on_connect(self):
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+
+    @override_settings(SQLITE_TUNING=False)
+    def test_stock_behaviour_without_tuning(self):
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+        wrapper._start_transaction_under_autocommit()
+        self.assertTrue(self.lock_is_free())
+        wrapper.rollback()
+
+    @override_settings(SQLITE_TUNING=True)
+    def test_transaction_takes_write_lock_until_commit(self):
+        wrapper = self.connect()
+        wrapper._start_transaction_under_autocommit()
+        self.assertFalse(self.lock_is_free())
+        # BEGIN IMMEDIATE: другой процесс писать уже не может.
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            other.execute('BEGIN IMMEDIATE')
+        wrapper.commit()
+        self.assertTrue(self.lock_is_free())
+        other.execute('BEGIN IMMEDIATE')
+        other.rollback()
+
+
+@override_settings(SQLITE_WRITE_RETRIES=2, SQLITE_WRITE_BACKOFF=0)
+class RunSerializedTest(SimpleTestCase):
+    databases = {'default'}
+
+    def test_retries_locked_database(self):
+        write = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'done'])
+        self.assertEqual(run_serialized(write), 'done')
+        self.assertEqual(write.call_count, 2)
+
+    def test_gives_up_after_retries(self):
+        write = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            run_serialized(write)
+        self.assertEqual(write.call_count, 3)
+
+    def test_other_errors_not_retried(self):
+        write = mock.Mock(side_effect=OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            run_serialized(write)
+        self.assertEqual(write.call_count, 1)
+
+    def test_serialized_decorator(self):
+        """Записи из сигналов повторяются только в режиме SQLITE_TUNING"""
+        write = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'done'])
+        with override_settings(SQLITE_TUNING=True):
+            self.assertEqual(serialized(write)(1, key=2), 'done')
+        write.assert_called_with(1, key=2)
+        self.assertEqual(write.call_count, 2)
+        write = mock.Mock(side_effect=OperationalError('database is locked'))
+        with override_settings(SQLITE_TUNING=False):
+            with self.assertRaises(OperationalError):
+                serialized(write)()
+        self.assertEqual(write.call_count, 1)
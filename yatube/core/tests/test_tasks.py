@@ -0,0 +1,108 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import tasks
+from core.models import Job
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task('tests.record', batch=True)
+def record(batch):
+    calls.append(sorted(kwargs['value'] for kwargs in batch))
+
+
+@tasks.task('tests.broken', max_attempts=2)
+def broken():
+    raise RuntimeError('сломалось')
+
+
+def drain():
+    tasks.work(batch_size=100, poll_interval=0, once=True)
+
+
+@override_settings(TASKS_EAGER=False)
+class TasksTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_batching_and_keys(self):
+        for value in (1, 1, 2):
+            record.enqueue(value=value)
+        record.enqueue(key='once', value=3)
+        record.enqueue(key='once', value=4)
+        self.assertEqual(Job.objects.filter(state=Job.PENDING).count(), 4)
+        drain()
+        self.assertEqual(calls, [[1, 2, 3]])
+        self.assertEqual(Job.objects.filter(state=Job.DONE).count(), 4)
+        record.enqueue(key='once', value=5)
+        drain()
+        self.assertEqual(calls, [[1, 2, 3]])
+
+    def test_retry_then_fail(self):
+        broken.enqueue()
+        drain()
+        job = Job.objects.get()
+        self.assertEqual((job.state, job.attempts), (Job.PENDING, 1))
+        self.assertIn('сломалось', job.error)
+        Job.objects.update(run_at=job.created)
+        drain()
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (Job.FAILED, 2))
+        stats = tasks.queue_stats()
+        self.assertEqual(stats['tests.broken']['failed'], 1)
+
+    def test_stats(self):
+        record.enqueue(value=1)
+        self.assertEqual(tasks.queue_stats()['tests.record']['pending'], 1)
+        drain()
+        stats = tasks.queue_stats()['tests.record']
+        self.assertEqual((stats['pending'], stats['done']), (0, 1))
+        self.assertIn('p95', stats['latency_ms'])
+
+    def test_post_side_effects_queued(self):
+        author = User.objects.create_user(username='queued_author')
+        reader = User.objects.create_user(username='queued_reader')
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(author=author, text='в очереди')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        drain()
+        self.assertTrue(FeedEntry.objects.filter(
+            user=reader, post=post).exists())
+        self.assertFalse(Job.objects.exclude(state=Job.DONE).exists())
+
+    def test_stale_worker_result_discarded(self):
+        """Задачу, отданную другому воркеру, прежний не завершает"""
+        record.enqueue(value=1)
+        stale = tasks.claim(batch_size=10)
+        Job.objects.update(started=stale[0].created - timedelta(days=1))
+        tasks.requeue_stale()
+        fresh = tasks.claim(batch_size=10)
+        tasks.run_jobs(stale)
+        self.assertEqual(Job.objects.get().state, Job.RUNNING)
+        tasks.run_jobs(fresh)
+        self.assertEqual(Job.objects.get().state, Job.DONE)
+        self.assertEqual(calls, [[1], [1]])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_new_post_invalidated_once(self):
+        author = User.objects.create_user(username='eager_author')
+        with mock.patch('posts.caching.bump') as bump:
+            Post.objects.create(author=author, text='один раз')
+        scopes = [scope for call in bump.call_args_list
+                  for scope in call[0][0]]
+        self.assertEqual(len(scopes), len(set(scopes)))
+
+    def test_new_post_visible_before_fan_out(self):
+        """Общие ленты показывают пост, не дожидаясь воркера"""
+        author = User.objects.create_user(username='waiting_author')
+        self.client.get('/')
+        Post.objects.create(author=author, text='ещё не разложен')
+        self.assertContains(self.client.get('/'), 'ещё не разложен')
+        self.assertTrue(Job.objects.filter(name='posts.fan_out').exists())
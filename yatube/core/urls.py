@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('fragments/nav/<str:view_name>/', views.nav_fragment,
+         name='nav_fragment'),
+    path('debug/db-pools/', views.db_pools, name='db_pools'),
+    path('debug/cache-stats/', views.cache_stats, name='cache_stats'),
+]
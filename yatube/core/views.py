@@ -1,4 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+
+from . import pool
+from .cache import hit_ratios
 
 
 def page_not_found(request, exception):
@@ -15,3 +21,26 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@never_cache
+def nav_fragment(request, view_name):
+    """Пункты меню пользователя; view_name — страница оболочки, чтобы
+    подсветить её пункт."""
+    context = {'view_name': view_name}
+    return render(request, 'includes/header_user.html', context)
+
+
+@staff_member_required
+@never_cache
+def db_pools(request):
+    """Метрики пулов соединений этого процесса (core.pool)."""
+    return JsonResponse(pool.all_stats())
+
+
+@staff_member_required
+@never_cache
+def cache_stats(request):
+    """Доля попаданий в кеши страниц, фрагментов и групп в этом
+    процессе (core.cache.lookup)."""
+    return JsonResponse(hit_ratios())
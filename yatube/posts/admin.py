@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Group, Post, Comment, Follow
+from .search import matching_ids
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -14,6 +15,13 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group', )
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%...%' по всей таблице — полнотекстовый индекс.
+        if not search_term.strip():
+            return queryset, False
+        ids = matching_ids(search_term, queryset.db)
+        return queryset.filter(pk__in=ids), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,53 @@
+"""Общие помощники для бенчмарков (manage.py bench_*)."""
+import itertools
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.test.utils import setup_databases, teardown_databases
+
+from .models import Post
+
+BULK_BATCH_SIZE = 5000
+WORDS = ('кошка', 'собака', 'город', 'дорога', 'солнце', 'книга', 'море',
+         'зима', 'лето', 'друг', 'работа', 'музыка', 'утро', 'вечер')
+
+
+@contextmanager
+def bench_database():
+    """Поднимает временную БД, чтобы не трогать рабочую."""
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+def measure(func, repeat=5):
+    """Медианное время вызова func в секундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def make_posts(count, author, group=None, batch_size=BULK_BATCH_SIZE):
+    """Быстро создаёт count постов через bulk_create."""
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        Post.objects.bulk_create(
+            Post(author=author, group=group, text=f'bench post {start + i}')
+            for i in range(size))
+
+
+def power_law_weights(count, alpha):
+    """Накопленные веса рангов 1..count по закону Ципфа с показателем
+    alpha — для random.choices(cum_weights=...)."""
+    return list(itertools.accumulate(
+        rank ** -alpha for rank in range(1, count + 1)))
+
+
+def random_text(rng, words=WORDS, length=12):
+    return ' '.join(rng.choices(words, k=length))
@@ -0,0 +1,262 @@
+"""Поколения кеша лент.
+
+У каждой ленты (общая, группы, автора, подписок пользователя,
+комментарии поста, популярное) есть номер поколения в кеше. Он входит
+в ключи закешированных страниц и фрагментов, поэтому при изменении
+данных достаточно сменить поколение: старые ключи перестают читаться
+и вытесняются сами, а страницы можно хранить часами.
+"""
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+
+from core.cache import get_or_compute
+from core.edge import is_shell
+
+from .models import Group
+
+User = get_user_model()
+
+# Сколько поколений ещё склеивать в версию как есть.
+VERSION_MAX_SCOPES = 4
+
+
+def index_scope():
+    return 'index'
+
+
+def identifier(value):
+    """slug или имя пользователя для ключа кеша: memcached не принимает
+    пробелы и не-ASCII и ограничивает длину ключа."""
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def group_scope(slug):
+    return f'group:{identifier(slug)}'
+
+
+def group_info_scope(slug):
+    """Сама группа (название, описание), без её постов."""
+    return f'group_info:{identifier(slug)}'
+
+
+def author_scope(username):
+    return f'author:{identifier(username)}'
+
+
+def author_posts_scope(author_id):
+    """Посты автора — для лент подписок его читателей."""
+    return f'posts_by:{author_id}'
+
+
+def follow_scope(user_id):
+    """Подписки пользователя (сам набор авторов)."""
+    return f'follow:{user_id}'
+
+
+def follow_feed_scopes(user_id, author_ids):
+    """Лента подписок: набор авторов и посты каждого из них.
+
+    Пост сбрасывает поколение своего автора, а не ленты каждого
+    подписчика: запись стоит O(1) и для авторов с тысячами читателей.
+    """
+    return [follow_scope(user_id)] + [
+        author_posts_scope(author_id) for author_id in sorted(author_ids)]
+
+
+def comments_scope(post_id):
+    return f'comments:{post_id}'
+
+
+def trending_scope():
+    return 'trending'
+
+
+def generation_key(scope):
+    return f'generation:{scope}'
+
+
+def new_generation():
+    """Время создания в мс (hex) и случайный хвост."""
+    return f'{int(time.time() * 1000):011x}{uuid.uuid4().hex[:6]}'
+
+
+def generation_time(generation):
+    try:
+        return int(generation[:11], 16) / 1000
+    except ValueError:
+        return 0.0
+
+
+def get_generations(scopes):
+    keys = [generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    missing = {key: new_generation()
+               for key in keys if key not in generations}
+    if missing:
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+def get_version(scopes):
+    """Текущая версия набора лент: их поколения через точку, а для
+    длинного набора (лента подписок) — хеш от них, чтобы версия
+    помещалась в ключ кеша."""
+    version = '.'.join(get_generations(scopes))
+    if len(scopes) > VERSION_MAX_SCOPES:
+        return hashlib.md5(version.encode()).hexdigest()
+    return version
+
+
+def changed_recently(scopes):
+    """Менялась ли какая-то из лент за последние REPLICA_MAX_LAG секунд:
+    реплика БД может этих изменений ещё не видеть."""
+    newest = max(generation_time(generation)
+                 for generation in get_generations(scopes))
+    return time.time() - newest < settings.REPLICA_MAX_LAG
+
+
+def replica_may_lag(scopes):
+    """unless для core.db.replica_reads: страницу, собранную по отставшей
+    реплике, кеш и ETag закрепили бы под новым поколением."""
+    def check(request, *args, **kwargs):
+        feed_scopes = scopes(request, *args, **kwargs)
+        return feed_scopes is not None and changed_recently(feed_scopes)
+    return check
+
+
+def bump(scopes):
+    """Сбрасывает закешированные страницы лент."""
+    cache.set_many({generation_key(scope): new_generation()
+                    for scope in scopes}, None)
+
+
+def is_cacheable(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def viewer_key(request):
+    """Для кого отрендерена страница: пользователь, гость (0) или
+    общая для всех оболочка core.edge."""
+    if is_shell(request):
+        return 'shell'
+    return request.user.pk or 0
+
+
+def cache_feed(name, scopes):
+    """Кеширует GET-ответы ленты до смены поколения scopes(...).
+
+    Ключ включает пользователя: в шапке и кнопках есть его данные.
+    Пустой ключ заполняет один запрос, остальные ждут (get_or_compute).
+    Версия лент кладётся в request.cache_version для {% cache %}.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            request.cache_version = get_version(
+                scopes(request, *args, **kwargs))
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = (f'feed_page:{name}:{request.cache_version}:'
+                   f'{viewer_key(request)}:{path}')
+            response, _ = get_or_compute(
+                cache, key, lambda: view(request, *args, **kwargs),
+                settings.FEED_CACHE_TIMEOUT, cacheable=is_cacheable,
+                name=name)
+            return response
+        return wrapper
+    return decorator
+
+
+def csrf_key(request):
+    """CSRF-токен, который попадёт в формы страницы; при входе он
+    меняется, так что страница из кеша браузера с прежним токеном
+    перестаёт совпадать по тегу."""
+    if is_shell(request) or not request.user.is_authenticated:
+        return ''
+    get_token(request)
+    return request.META['CSRF_COOKIE']
+
+
+def feed_etag(name, scopes, forms=False):
+    """etag_func для @condition: версия лент, пользователь и адрес.
+
+    Поколение меняется при любом изменении постов ленты, поэтому
+    неизменённая лента отвечает 304 без запросов к БД и рендеринга.
+    Пользователь входит в тег: у каждого своя шапка, кнопки и формы.
+    Если scopes(...) вернул None (объекта нет), тега нет и view
+    отвечает как обычно. forms — на странице есть формы с CSRF-токеном,
+    он тоже входит в тег.
+    """
+    def etag(request, *args, **kwargs):
+        feed_scopes = scopes(request, *args, **kwargs)
+        if feed_scopes is None:
+            return None
+        version = get_version(feed_scopes)
+        raw = (f'{name}:{version}:{viewer_key(request)}:'
+               f'{request.get_full_path()}')
+        if forms:
+            raw += f':{csrf_key(request)}'
+        return hashlib.md5(raw.encode()).hexdigest()
+    return etag
+
+
+def post_page_scopes(post, group_ids):
+    """Общие ленты с постом: главная, автора и групп."""
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    return ([index_scope(), author_scope(post.author.username)]
+            + [group_scope(slug) for slug in slugs])
+
+
+def post_changed(post, group_ids):
+    """Пост изменён или удалён: сбрасываем все ленты с ним."""
+    bump(post_page_scopes(post, group_ids)
+         + [author_posts_scope(post.author_id)])
+
+
+def post_created(post):
+    """Новый пост: общие ленты сбрасываются сразу, в запросе, — иначе
+    до выполнения fan_out их кеш прятал бы пост даже от автора."""
+    bump(post_page_scopes(post, {post.group_id}))
+
+
+def post_fanned_out(post):
+    """Пост разложен по лентам подписчиков (задача fan_out)."""
+    bump([author_posts_scope(post.author_id)])
+
+
+def authors_changed(author_ids, group_ids):
+    """Посты авторов добавлены пачкой в обход сигналов (импорт)."""
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        'username', flat=True)
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    bump([index_scope()]
+         + [author_scope(username) for username in usernames]
+         + [author_posts_scope(author_id) for author_id in author_ids]
+         + [group_scope(slug) for slug in slugs])
+
+
+def follow_changed(follow):
+    bump([follow_scope(follow.user_id),
+          author_scope(follow.author.username),
+          author_scope(follow.user.username)])
+
+
+def group_changed(group):
+    """Группа сохранена или удалена; при смене slug сбрасывается
+    и старый адрес."""
+    slugs = {group.slug, getattr(group, 'initial_slug', None) or group.slug}
+    bump([index_scope()]
+         + [group_scope(slug) for slug in slugs]
+         + [group_info_scope(slug) for slug in slugs])
+    group.initial_slug = group.slug
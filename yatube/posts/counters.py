@@ -0,0 +1,93 @@
+"""Денормализованные счётчики: посты и подписки в UserStats,
+комментарии в Post.comment_count.
+
+Счётчики меняются атомарно через F(), без чтения в Python. Если строки
+UserStats ещё нет, она создаётся с честно посчитанными значениями;
+расхождения чинит manage.py reconcile_counters.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from core.sqlite import serialized
+
+from .models import Comment, Follow, Post, UserStats
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def count_for_users(field, user_ids):
+    """Настоящие значения счётчика field для пачки пользователей.
+
+    order_by() сбрасывает Meta.ordering: иначе поле сортировки попадает
+    в GROUP BY и счётчик дробится по датам.
+    """
+    model, lookup = USER_COUNTERS[field]
+    rows = (model.objects
+            .filter(**{f'{lookup}__in': user_ids})
+            .order_by()
+            .values(lookup)
+            .annotate(total=Count('pk'))
+            .values_list(lookup, 'total'))
+    return dict(rows)
+
+
+def recount(user_id):
+    return {field: count_for_users(field, [user_id]).get(user_id, 0)
+            for field in USER_COUNTERS}
+
+
+@serialized
+def bump(user_id, field, delta):
+    """Сдвигает счётчик пользователя на delta."""
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    updated = stats.update(**{field: F(field) + delta})
+    if not updated and delta > 0:
+        UserStats.objects.get_or_create(user_id=user_id,
+                                        defaults=recount(user_id))
+
+
+@serialized
+def bump_comments(post_id, delta):
+    """Сдвигает Post.comment_count на delta."""
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+def count_comments(post_ids):
+    rows = (Comment.objects
+            .filter(post__in=post_ids)
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values_list('post', 'total'))
+    return dict(rows)
+
+
+@transaction.atomic
+def reconcile_users(pks):
+    """Чинит UserStats пачки пользователей; возвращает число исправленных."""
+    actual = {field: count_for_users(field, pks)
+              for field in USER_COUNTERS}
+    existing = UserStats.objects.in_bulk(pks)
+    changed, missing = [], []
+    for pk in pks:
+        values = {field: actual[field].get(pk, 0) for field in actual}
+        stats = existing.get(pk)
+        if stats is None:
+            missing.append(UserStats(user_id=pk, **values))
+        elif any(getattr(stats, field) != value
+                 for field, value in values.items()):
+            for field, value in values.items():
+                setattr(stats, field, value)
+            changed.append(stats)
+    UserStats.objects.bulk_create(missing)
+    UserStats.objects.bulk_update(changed, list(USER_COUNTERS))
+    return len(changed) + len(missing)
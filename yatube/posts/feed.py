@@ -0,0 +1,172 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Новый пост сразу раскладывается по лентам подписчиков автора
+(таблица FeedEntry), поэтому follow_index читает одну ленту по индексу
+(user, pub_date, post) вместо соединения Follow и Post. Для авторов,
+у которых подписчиков больше FEED_FANOUT_LIMIT, раскладка не делается:
+их посты подмешиваются в ленту при чтении (fan-out on read).
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from core.sqlite import serialized
+
+from .models import FeedEntry, Follow, Post, UserStats
+from .utils import CURSOR_PREVIOUS, CursorPaginator, keyset
+
+
+def is_popular(author):
+    """Слишком много подписчиков, чтобы раскладывать посты по лентам."""
+    return UserStats.objects.filter(
+        user=author,
+        followers_count__gt=settings.FEED_FANOUT_LIMIT).exists()
+
+
+def popular_authors(user):
+    """id популярных авторов из подписок пользователя."""
+    return (Follow.objects
+            .filter(user=user,
+                    author__stats__followers_count__gt=(
+                        settings.FEED_FANOUT_LIMIT))
+            .values_list('author', flat=True))
+
+
+@serialized
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if is_popular(post.author):
+        return
+    followers = (Follow.objects
+                 .filter(author=post.author)
+                 .values_list('user', flat=True))
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post=post, author=post.author,
+                   pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        ignore_conflicts=True)
+
+
+def fan_out_new(post_ids):
+    """Раскладывает по лентам посты с id из post_ids (импорт).
+
+    Одним INSERT ... SELECT на стороне БД: строк может быть на порядки
+    больше, чем постов, и собирать их в Python незачем.
+    """
+    if not post_ids:
+        return
+    ops = connection.ops
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} '
+        f'{FeedEntry._meta.db_table} (user_id, post_id, author_id, pub_date) '
+        f'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+        f'FROM {Post._meta.db_table} post '
+        f'JOIN {Follow._meta.db_table} follow '
+        f'ON follow.author_id = post.author_id '
+        f'LEFT JOIN {UserStats._meta.db_table} stats '
+        f'ON stats.user_id = post.author_id '
+        f'WHERE post.id IN ({", ".join(["%s"] * len(post_ids))}) '
+        f'AND COALESCE(stats.followers_count, 0) <= %s'
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*post_ids, settings.FEED_FANOUT_LIMIT])
+
+
+@serialized
+def backfill(user, author):
+    """Заполняет ленту последними постами автора после подписки."""
+    if is_popular(author):
+        return
+    posts = (author.posts
+             .order_by('-pub_date')
+             .values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE])
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user=user, post_id=pk, author=author, pub_date=pub_date)
+         for pk, pub_date in posts),
+        ignore_conflicts=True)
+
+
+@serialized
+def materialize(author):
+    """Раскладывает последние посты автора по лентам всех подписчиков.
+
+    Нужно, когда подписчиков стало не больше FEED_FANOUT_LIMIT: посты,
+    вышедшие, пока автор был популярным, в ленты не попали, а при
+    чтении больше не подмешиваются.
+    """
+    if is_popular(author):
+        return
+    posts = list(author.posts
+                 .order_by('-pub_date')
+                 .values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE])
+    followers = (Follow.objects
+                 .filter(author=author)
+                 .values_list('user', flat=True))
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post_id=pk, author=author,
+                   pub_date=pub_date)
+         for user_id in followers.iterator() for pk, pub_date in posts),
+        ignore_conflicts=True)
+
+
+@serialized
+def prune(user, author):
+    """Убирает посты автора из ленты после отписки."""
+    FeedEntry.objects.filter(user=user, author=author).delete()
+
+
+def rebuild(user):
+    """Пересобирает ленту пользователя по его текущим подпискам."""
+    FeedEntry.objects.filter(user=user).delete()
+    for follow in Follow.objects.filter(user=user).select_related('author'):
+        backfill(user, follow.author)
+
+
+def get_follow_feed(user):
+    """Все посты ленты подписок одним queryset (для Paginator.page())."""
+    in_feed = Q(pk__in=FeedEntry.objects.filter(user=user).values('post'))
+    return Post.objects.filter(
+        in_feed | Q(author__in=popular_authors(user)))
+
+
+class FeedPaginator(CursorPaginator):
+    """Курсорная пагинация ленты подписок.
+
+    Страница собирается слиянием двух упорядоченных по (pub_date, id)
+    источников: материализованной ленты и постов популярных авторов.
+    """
+
+    def __init__(self, user, object_list, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.user = user
+
+    def fetch(self, cursor, limit):
+        entries = keyset(FeedEntry.objects.filter(user=self.user), cursor,
+                         key_field='post_id')
+        keys = set(entries.values_list('pub_date', 'post_id')[:limit])
+        keys.update((post.pub_date, post.pk)
+                    for post in self.popular_posts(cursor, limit))
+        forward = cursor is None or cursor[0] != CURSOR_PREVIOUS
+        keys = sorted(keys, reverse=forward)[:limit]
+        posts = self.object_list.in_bulk([pk for _, pk in keys])
+        return [posts[pk] for _, pk in keys if pk in posts]
+
+    def popular_posts(self, cursor, limit):
+        """До limit постов каждого популярного автора после курсора.
+
+        Один запрос: UNION ALL подзапросов по авторам, каждый идёт по
+        индексу (author, pub_date). author IN (...) потребовал бы
+        сортировки всех их постов, а запрос на автора — N+1.
+        """
+        db = self.object_list.db
+        parts, params = [], []
+        for number, author_id in enumerate(popular_authors(self.user)):
+            posts = keyset(Post.objects.filter(author_id=author_id), cursor)
+            sql, part_params = (posts.values_list('pk', 'pub_date')[:limit]
+                                .query.get_compiler(using=db).as_sql())
+            parts.append(f'SELECT * FROM ({sql}) author_{number}')
+            params.extend(part_params)
+        if not parts:
+            return []
+        return list(Post.objects.using(db).raw(
+            ' UNION ALL '.join(parts), params))
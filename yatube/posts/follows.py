@@ -0,0 +1,40 @@
+"""Подписки пользователя, от имени которого идёт запрос.
+
+following_ids(request) один раз за запрос получает множество id
+авторов, на которых подписан пользователь, — из кеша или одним
+запросом к БД, — и дальше «подписан ли» проверяется поиском
+в множестве. Кеш сбрасывают сигналы подписки и отписки, а код,
+меняющий подписки в обход сигналов (bulk_create, update), вызывает
+forget_following сам; на случай пропуска кеш живёт не дольше
+FOLLOWING_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow
+
+
+def following_key(user_id):
+    return f'following_ids:{user_id}'
+
+
+def load_following(user_id):
+    key = following_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Follow.objects.filter(user_id=user_id)
+                        .values_list('author_id', flat=True))
+        cache.set(key, ids, settings.FOLLOWING_CACHE_TIMEOUT)
+    return ids
+
+
+def forget_following(*user_ids):
+    cache.delete_many([following_key(user_id) for user_id in user_ids])
+
+
+def following_ids(request):
+    if not request.user.is_authenticated:
+        return frozenset()
+    if not hasattr(request, 'following_ids'):
+        request.following_ids = load_following(request.user.pk)
+    return request.following_ids
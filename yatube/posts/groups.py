@@ -0,0 +1,62 @@
+"""Сообщества по slug без запроса к БД.
+
+Группы меняются редко, а нужны каждой странице сообщества.
+get_group(slug) держит их в памяти процесса (LRU на GROUP_CACHE_SIZE
+slug) вместе с поколением group_info_scope(slug) из общего кеша:
+сохранение или удаление группы меняет поколение
+(caching.group_changed), и каждый процесс перечитает группу при
+следующем обращении. Несуществующий slug тоже запоминается.
+В памяти лежат значения полей, а не модель: каждый вызов получает
+свой экземпляр, и потоки не делят один объект. Попадания и промахи
+учитываются в core.cache.lookups как 'group_info'.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import Http404
+
+from core.cache import lookup
+
+from . import caching
+from .models import Group
+
+groups = OrderedDict()
+groups_lock = threading.Lock()
+
+
+def build_group(row):
+    if row is None:
+        return None
+    return Group.from_db(row['db'], row['fields'], row['values'])
+
+
+def get_group(slug):
+    """Группа по slug или None."""
+    # Поколение читается до БД: если группу поменяют между ними,
+    # запомненное поколение уже устарело и группа перечитается.
+    version = caching.get_version([caching.group_info_scope(slug)])
+    with groups_lock:
+        entry = groups.get(slug)
+        if entry is not None and entry[0] == version:
+            groups.move_to_end(slug)
+            lookup('group_info', True)
+            return build_group(entry[1])
+    queryset = Group.objects.filter(slug=slug)
+    values = queryset.values().first()
+    row = values and {'db': queryset.db, 'fields': list(values),
+                      'values': tuple(values.values())}
+    with groups_lock:
+        groups[slug] = (version, row)
+        groups.move_to_end(slug)
+        while len(groups) > settings.GROUP_CACHE_SIZE:
+            groups.popitem(last=False)
+    lookup('group_info', False)
+    return build_group(row)
+
+
+def get_group_or_404(slug):
+    group = get_group(slug)
+    if group is None:
+        raise Http404(f'Нет сообщества {slug}')
+    return group
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.bench import bench_database, make_posts, measure
+from posts.feed import FeedPaginator, get_follow_feed
+from posts.models import Follow, Post
+from posts.utils import CursorPaginator
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ленту подписок через JOIN Follow/Post '
+            'с материализованной лентой (во временной БД).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=2000)
+        parser.add_argument('--followed', type=int, default=1000)
+        parser.add_argument('--posts-per-author', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            reader = User.objects.create(username='bench_reader')
+            # На SQLite bulk_create не отдаёт id: авторов перечитываем.
+            User.objects.bulk_create(
+                User(username=f'bench_author_{i}')
+                for i in range(options['authors']))
+            authors = list(User.objects.exclude(pk=reader.pk))
+            for author in authors:
+                make_posts(options['posts_per_author'], author)
+            for author in authors[:options['followed']]:
+                Follow.objects.create(user=reader, author=author)
+
+            def join_page():
+                posts = (Post.objects
+                         .filter(author__following__user=reader)
+                         .select_related('author', 'group'))
+                CursorPaginator(posts, settings.COUNT_POST).get_cursor_page()
+
+            def materialized_page():
+                posts = (get_follow_feed(reader)
+                         .select_related('author', 'group'))
+                FeedPaginator(reader, posts, settings.COUNT_POST
+                              ).get_cursor_page()
+
+            cases = (
+                ('join', join_page),
+                ('materialized', materialized_page),
+            )
+            for name, func in cases:
+                seconds = measure(func, options['repeat'])
+                self.stdout.write(f'{name:<13}: {seconds * 1000:8.2f} ms')
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from posts import thumbnails
+from posts.bench import bench_database
+from posts.models import Post
+
+User = get_user_model()
+
+# Ширина экрана в CSS-пикселях и плотность пикселей.
+VIEWPORTS = ((360, 2), (768, 1), (1280, 1), (1920, 2))
+# Ширина слота картинки по IMAGE_SIZES из posts.templatetags.post_images.
+DESKTOP_MIN_WIDTH, DESKTOP_SLOT = 992, 960
+
+
+def stored_size(url):
+    return default_storage.size(url[len(settings.MEDIA_URL):])
+
+
+def pick_variant(variants, pixels):
+    """Как браузер по srcset: самый узкий вариант не уже pixels."""
+    for url, width in variants:
+        if width >= pixels:
+            return url
+    return variants[-1][0]
+
+
+class Command(BaseCommand):
+    help = ('Считает байты картинок на странице ленты: одна миниатюра '
+            '960x339 против srcset-вариантов (во временной БД).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--image', default=os.path.join(
+                settings.MEDIA_ROOT, 'posts', '2.jpg'))
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root), bench_database():
+                self.run(options['image'])
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def run(self, image_path):
+        author = User.objects.create(username='bench')
+        with open(image_path, 'rb') as image:
+            name = default_storage.save(
+                f'posts/{os.path.basename(image_path)}',
+                ContentFile(image.read()))
+        # bulk_create без сигналов: варианты строим здесь же, синхронно.
+        Post.objects.bulk_create(
+            Post(author=author, text=f'bench post {i}', image=name)
+            for i in range(settings.COUNT_POST))
+        for post_id in Post.objects.values_list('pk', flat=True):
+            thumbnails.generate(post_id)
+        posts = list(Post.objects.all())
+        before = sum(stored_size(post.thumbnail) for post in posts)
+        self.stdout.write(f'{"одна миниатюра 960x339":<28}: {before:>9} B')
+        formats = thumbnails.variant_formats()
+        for width, density in VIEWPORTS:
+            slot = DESKTOP_SLOT if width >= DESKTOP_MIN_WIDTH else width
+            after = sum(
+                stored_size(pick_variant(
+                    post.variants[formats[0].lower()], slot * density))
+                for post in posts)
+            label = f'srcset {formats[0]} {width}px@{density}x'
+            self.stdout.write(
+                f'{label:<28}: {after:>9} B ({after / before:.0%})')
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+
+from posts.bench import bench_database, make_posts, measure
+from posts.models import Post
+from posts.utils import CURSOR_NEXT, CursorPaginator, encode_cursor, keyset
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает OFFSET- и keyset-пагинацию на первой '
+            'и глубокой странице ленты (во временной БД).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--page', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        per_page = settings.COUNT_POST
+        page = options['page']
+        if page < 2 or (page - 1) * per_page >= options['posts']:
+            raise CommandError('Глубокая страница должна быть в пределах '
+                               'сгенерированных постов.')
+        with bench_database():
+            author = User.objects.create(username='bench')
+            make_posts(options['posts'], author)
+            posts = Post.objects.select_related('author', 'group')
+            offset = (page - 1) * per_page
+            last_seen = keyset(posts, None)[offset - 1]
+            deep_cursor = encode_cursor(last_seen, CURSOR_NEXT)
+
+            def offset_page(number):
+                return lambda: list(Paginator(posts, per_page)
+                                    .get_page(number))
+
+            def cursor_page(token):
+                return lambda: list(CursorPaginator(posts, per_page)
+                                    .get_cursor_page(token))
+
+            cases = (
+                ('offset', 1, offset_page(1)),
+                ('offset', page, offset_page(page)),
+                ('cursor', 1, cursor_page(None)),
+                ('cursor', page, cursor_page(deep_cursor)),
+            )
+            for name, number, func in cases:
+                seconds = measure(func, options['repeat'])
+                self.stdout.write(
+                    f'{name:<7} page {number:>7}: {seconds * 1000:8.2f} ms')
@@ -0,0 +1,64 @@
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.bench import (
+    BULK_BATCH_SIZE, WORDS, bench_database, measure, random_text)
+from posts.models import Post
+
+User = get_user_model()
+
+# Слова из WORDS есть почти в каждом посте, редкое — в одном из тысячи.
+RARE_WORD = 'велосипед'
+RARE_EVERY = 1000
+
+
+def post_text(number, rng):
+    text = random_text(rng)
+    if number % RARE_EVERY == 0:
+        text += f' {RARE_WORD}'
+    return text
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск через icontains (LIKE по всей таблице) '
+            'и через полнотекстовый индекс (во временной БД).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            author = User.objects.create(username='bench')
+            self.make_posts(options['posts'], author)
+            posts = Post.objects.select_related('author', 'group')
+            per_page = settings.COUNT_POST
+
+            def like(word):
+                return lambda: list(
+                    posts.filter(text__icontains=word)[:per_page])
+
+            def indexed(word):
+                return lambda: list(
+                    search.SearchPaginator(word, posts, per_page)
+                    .get_cursor_page())
+
+            for word in (WORDS[0], RARE_WORD):
+                for name, func in (('icontains', like), ('index', indexed)):
+                    seconds = measure(func(word), options['repeat'])
+                    self.stdout.write(
+                        f'{name:<9} {word:<10}: {seconds * 1000:8.2f} ms')
+
+    def make_posts(self, count, author):
+        # bulk_create не шлёт сигналы, поэтому индекс заполняем сами.
+        rng = random.Random(0)
+        for start in range(0, count, BULK_BATCH_SIZE):
+            size = min(BULK_BATCH_SIZE, count - start)
+            Post.objects.bulk_create(
+                Post(author=author, text=post_text(start + i, rng))
+                for i in range(size))
+        search.reindex(Post.objects.all())
@@ -0,0 +1,93 @@
+import multiprocessing
+import resource
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.shortcuts import render
+from django.test import RequestFactory
+from django.urls import reverse
+
+from posts import views
+from posts.bench import bench_database, make_posts
+
+User = get_user_model()
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+
+def peak_rss_bytes():
+    # На Linux ru_maxrss — в килобайтах.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def request_for(author):
+    request = RequestFactory().get(
+        reverse('posts:profile_all', args=[author.username]))
+    request.user = AnonymousUser()
+    return request
+
+
+def full_render(author):
+    """Как сейчас: вся страница собирается в памяти до отправки."""
+    response = render(request_for(author), 'posts/all_posts.html', {
+        'title': author.username,
+        'posts': author.posts.select_related('author')})
+    first_byte = time.perf_counter()
+    return first_byte, len(response.content)
+
+
+def streaming(author):
+    response = views.profile_all(request_for(author), author.username)
+    chunks = iter(response.streaming_content)
+    size = len(next(chunks))
+    first_byte = time.perf_counter()
+    size += sum(len(chunk) for chunk in chunks)
+    return first_byte, size
+
+
+def measure_in_child(func, author, pipe):
+    """Замер в отдельном процессе: пик RSS не наследует прошлые прогоны."""
+    baseline = rss_bytes()
+    started = time.perf_counter()
+    first_byte, size = func(author)
+    finished = time.perf_counter()
+    pipe.send({
+        'ttfb': first_byte - started,
+        'total': finished - started,
+        'rss': max(peak_rss_bytes() - baseline, 0),
+        'size': size,
+    })
+    pipe.close()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время до первого байта и пик RSS при выводе '
+            'всех постов автора через render() и потоком '
+            '(во временной БД, каждый замер в своём процессе; Linux).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20_000)
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        with bench_database():
+            author = User.objects.create(username='bench')
+            make_posts(options['posts'], author)
+            for name, func in (('render', full_render),
+                               ('streaming', streaming)):
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=measure_in_child, args=(func, author, sender))
+                process.start()
+                result = receiver.recv()
+                process.join()
+                self.stdout.write(
+                    f'{name:<10}: TTFB {result["ttfb"] * 1000:9.2f} ms, '
+                    f'всего {result["total"] * 1000:9.2f} ms, '
+                    f'пик RSS +{result["rss"] / 2 ** 20:7.1f} MB, '
+                    f'{result["size"] / 2 ** 20:.1f} MB HTML')
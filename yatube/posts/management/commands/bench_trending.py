@@ -0,0 +1,67 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import trending
+from posts.bench import BULK_BATCH_SIZE, bench_database, measure
+from posts.models import Post, UserStats
+from posts.utils import explicit_dates
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Время пересчёта рейтинга «Популярное» на большом числе '
+            'постов: отдельно счёт в Python и полный rank() с записью '
+            'TrendingScore. Работает во временной БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with bench_database():
+            self.populate(rng, options)
+            now = timezone.now()
+            rows = list(Post.objects.order_by().values_list(
+                'pk', 'comment_count', 'author__stats__followers_count',
+                'pub_date'))
+            scoring = measure(lambda: trending.score_batch(rows, now),
+                              options['repeat'])
+            total = trending.rank(now, options['batch_size'])
+            ranking = measure(
+                lambda: trending.rank(now, options['batch_size']),
+                options['repeat'])
+        self.stdout.write(
+            f'постов в рейтинге: {total}\n'
+            f'счёт в Python: {scoring:.2f} с '
+            f'({len(rows) / scoring:,.0f} постов/с)\n'
+            f'rank() целиком: {ranking:.2f} с '
+            f'({total / ranking:,.0f} постов/с)')
+
+    def populate(self, rng, options):
+        User.objects.bulk_create(
+            User(username=f'bench_trending_{number}', password='!')
+            for number in range(options['authors']))
+        author_ids = list(User.objects.values_list('pk', flat=True))
+        UserStats.objects.bulk_create(
+            UserStats(user_id=pk, followers_count=int(rng.paretovariate(1)))
+            for pk in author_ids)
+        now = timezone.now()
+        pub_date = Post._meta.get_field('pub_date')
+        with explicit_dates(pub_date):
+            for start in range(0, options['posts'], BULK_BATCH_SIZE):
+                size = min(BULK_BATCH_SIZE, options['posts'] - start)
+                Post.objects.bulk_create(
+                    Post(author_id=rng.choice(author_ids),
+                         text=f'bench post {start + number}',
+                         comment_count=int(rng.expovariate(0.2)),
+                         pub_date=now - timezone.timedelta(
+                             hours=rng.uniform(0, 24 * 7)))
+                    for number in range(size))
@@ -0,0 +1,211 @@
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application)
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.profiling import PERCENTILES, percentile
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+VIEWS = ('posts:index', 'posts:group_list', 'posts:profile',
+         'posts:post_detail', 'posts:follow_index')
+SAMPLE_SIZE = 200
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=settings.BASE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_post_ids(rng, count):
+    """Случайные id постов без ORDER BY RANDOM() по всей таблице."""
+    max_pk = Post.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+    candidates = {rng.randint(1, max_pk) for _ in range(count * 2)}
+    return list(Post.objects.filter(pk__in=candidates)
+                .values_list('pk', flat=True)[:count]) if max_pk else []
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест лент: параллельные клиенты запрашивают '
+            'index, group_list, profile, post_detail и follow_index '
+            'у локального сервера; итог — JSON с RPS и перцентилями '
+            'задержки для сравнения между коммитами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Адрес уже запущенного сервера; '
+                                          'по умолчанию поднимается свой.')
+        parser.add_argument('--views', nargs='*', default=VIEWS,
+                            choices=VIEWS)
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на каждый view.')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+        parser.add_argument('--baseline',
+                            help='JSON прошлого прогона для сравнения.')
+        parser.add_argument('--max-regression', type=float,
+                            help='Ошибка, если p95 какого-то view вырос '
+                                 'больше чем на столько процентов.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        paths = self.target_paths(rng, options['views'])
+        cookie = self.session_cookie()
+        server = None
+        base_url = options['url']
+        if not base_url:
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+            server.set_app(get_internal_wsgi_application())
+            threading.Thread(target=server.serve_forever,
+                             daemon=True).start()
+            base_url = 'http://127.0.0.1:%d' % server.server_port
+        try:
+            results = {
+                view: self.run_view(base_url, view_paths, cookie, rng,
+                                    options)
+                for view, view_paths in paths.items()}
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        report = {
+            'commit': git_commit(),
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'clients': options['clients'],
+            'data': {model.__name__.lower(): model.objects.count()
+                     for model in (User, Group, Post, Comment, Follow)},
+            'views': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            self.compare(report, options['baseline'],
+                         options['max_regression'])
+
+    def target_paths(self, rng, views):
+        """Набор адресов для каждого view по данным в БД."""
+        slugs = list(Group.objects.values_list('slug', flat=True)
+                     [:SAMPLE_SIZE])
+        usernames = list(UserStats.objects
+                         .filter(posts_count__gt=0)
+                         .order_by('-posts_count')
+                         .values_list('user__username', flat=True)
+                         [:SAMPLE_SIZE])
+        post_ids = sample_post_ids(rng, SAMPLE_SIZE)
+        paths = {
+            'posts:index': [reverse('posts:index')],
+            'posts:group_list': [
+                reverse('posts:group_list', args=[slug]) for slug in slugs],
+            'posts:profile': [
+                reverse('posts:profile', args=[username])
+                for username in usernames],
+            'posts:post_detail': [
+                reverse('posts:post_detail', args=[pk]) for pk in post_ids],
+            'posts:follow_index': [reverse('posts:follow_index')],
+        }
+        missing = [view for view in views if not paths[view]]
+        if missing:
+            raise CommandError(f'Нет данных для {", ".join(missing)}: '
+                               'заполните БД manage.py generate_data.')
+        return {view: paths[view] for view in views}
+
+    def session_cookie(self):
+        """Сессия самого активного читателя — для follow_index."""
+        reader = (UserStats.objects.order_by('-following_count')
+                  .select_related('user').first())
+        if reader is None:
+            return None
+        client = Client()
+        client.force_login(reader.user)
+        name = settings.SESSION_COOKIE_NAME
+        return f'{name}={client.cookies[name].value}'
+
+    def run_view(self, base_url, paths, cookie, rng, options):
+        urls = [base_url + rng.choice(paths)
+                for _ in range(options['warmup'] + options['requests'])]
+        headers = {'Cookie': cookie} if cookie else {}
+
+        def fetch(url):
+            request = urllib.request.Request(url, headers=headers)
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return time.perf_counter() - started, ok
+
+        with ThreadPoolExecutor(options['clients']) as pool:
+            list(pool.map(fetch, urls[:options['warmup']]))
+            started = time.perf_counter()
+            timings = list(pool.map(fetch, urls[options['warmup']:]))
+            elapsed = time.perf_counter() - started
+        latencies = sorted(seconds * 1000 for seconds, ok in timings if ok)
+        result = {
+            'requests': len(timings),
+            'errors': len(timings) - len(latencies),
+            'rps': round(len(timings) / elapsed, 2),
+            'latency_ms': {},
+        }
+        if latencies:
+            result['latency_ms'] = {
+                **{f'p{p}': round(percentile(latencies, p), 3)
+                   for p in PERCENTILES},
+                'mean': round(statistics.mean(latencies), 3),
+                'max': round(latencies[-1], 3),
+            }
+        return result
+
+    def compare(self, report, baseline_path, max_regression):
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressed = []
+        for view, result in report['views'].items():
+            old = baseline.get('views', {}).get(view)
+            if not old or not old['latency_ms'] or not result['latency_ms']:
+                continue
+            old_p95 = old['latency_ms']['p95']
+            change = (result['latency_ms']['p95'] - old_p95) / old_p95 * 100
+            self.stderr.write(
+                f'{view:<20} p95 {old_p95:>9.2f} -> '
+                f'{result["latency_ms"]["p95"]:>9.2f} ms ({change:+.1f}%), '
+                f'rps {old["rps"]} -> {result["rps"]}')
+            if max_regression is not None and change > max_regression:
+                regressed.append(view)
+        if regressed:
+            raise CommandError(
+                f'p95 вырос больше чем на {max_regression}%: '
+                f'{", ".join(regressed)}')
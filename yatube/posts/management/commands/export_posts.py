@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import (
+    FORMATS, Throughput, detect_format, post_records, write_records)
+
+REPORT_EVERY = 100_000
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты в NDJSON или CSV потоково, '
+            'с постоянным расходом памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--group', help='Только посты группы (slug).')
+        parser.add_argument('--author', help='Только посты автора.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        posts = Post.objects.all()
+        if options['group']:
+            posts = posts.filter(group__slug=options['group'])
+        if options['author']:
+            posts = posts.filter(author__username=options['author'])
+        records = post_records(posts, options['chunk_size'])
+        throughput = Throughput()
+        if path == '-':
+            self.export(records, sys.stdout, fmt, throughput)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                self.export(records, file, fmt, throughput)
+        self.stderr.write(f'Выгружено: {throughput}')
+
+    def export(self, records, file, fmt, throughput):
+        for count in write_records(records, file, fmt):
+            throughput.count = count
+            if count % REPORT_EVERY == 0:
+                self.stderr.write(str(throughput))
@@ -0,0 +1,139 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import search
+from posts.bench import BULK_BATCH_SIZE, power_law_weights, random_text
+from posts.follows import forget_following
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import explicit_dates
+
+User = get_user_model()
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = ('Заполняет текущую БД синтетическими данными для нагрузочных '
+            'тестов: пользователи, группы, посты, граф подписок '
+            'со степенным распределением и комментарии. Только для '
+            'стендов: данные пишутся bulk_create в рабочую БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=500_000)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Среднее число подписок пользователя.')
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='Показатель степенного закона '
+                                 'популярности авторов и постов.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней разбросать посты.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int,
+                            default=BULK_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        user_ids = self.make_users(options['users'])
+        group_ids = self.make_groups(options['groups'])
+        author_weights = power_law_weights(len(user_ids), options['alpha'])
+        self.make_posts(options['posts'], user_ids, author_weights,
+                        group_ids, options['days'])
+        self.make_follows(user_ids, author_weights, options['follows'])
+        self.make_comments(options['comments'], user_ids, options['alpha'])
+        self.stdout.write('Индекс поиска, счётчики и ленты подписок...')
+        search.reindex(Post.objects.all(), self.batch_size)
+        call_command('reconcile_counters', batch_size=self.batch_size,
+                     stdout=self.stdout)
+        call_command('rebuild_feeds', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Готово.'))
+
+    def bulk_create(self, model, objects, **kwargs):
+        created = 0
+        for batch in chunks(objects, self.batch_size):
+            model.objects.bulk_create(batch, **kwargs)
+            created += len(batch)
+        self.stdout.write(f'{model.__name__}: {created}')
+
+    def make_users(self, count):
+        first = User.objects.count()
+        self.bulk_create(User, [
+            User(username=f'load_user_{first + i}', password='!')
+            for i in range(count)])
+        return list(User.objects.filter(username__startswith='load_user_')
+                    .order_by('pk').values_list('pk', flat=True))
+
+    def make_groups(self, count):
+        first = Group.objects.count()
+        self.bulk_create(Group, [
+            Group(title=f'Группа {first + i}', slug=f'load-group-{first + i}',
+                  description=random_text(self.rng))
+            for i in range(count)])
+        return list(Group.objects.filter(slug__startswith='load-group-')
+                    .values_list('pk', flat=True))
+
+    def make_posts(self, count, user_ids, author_weights, group_ids, days):
+        rng = self.rng
+        span = timedelta(days=days).total_seconds()
+        pub_date = Post._meta.get_field('pub_date')
+        with explicit_dates(pub_date):
+            for start in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - start)
+                authors = rng.choices(user_ids, cum_weights=author_weights,
+                                      k=size)
+                Post.objects.bulk_create(
+                    Post(author_id=author_id,
+                         group_id=(rng.choice(group_ids)
+                                   if group_ids and rng.random() < 0.5
+                                   else None),
+                         text=random_text(rng, length=rng.randint(5, 60)),
+                         pub_date=self.now - timedelta(
+                             seconds=rng.random() * span))
+                    for author_id in authors)
+        self.stdout.write(f'Post: {count}')
+
+    def make_follows(self, user_ids, author_weights, mean):
+        # Число подписок у читателя — экспоненциальное, выбор автора —
+        # по степенному закону: немногие авторы собирают почти всех.
+        follows = set()
+        for user_id in user_ids:
+            count = min(round(self.rng.expovariate(1 / mean)),
+                        len(user_ids) - 1) if mean else 0
+            authors = self.rng.choices(
+                user_ids, cum_weights=author_weights, k=count)
+            follows.update((user_id, author_id) for author_id in authors
+                           if author_id != user_id)
+        self.bulk_create(Follow, [
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in follows], ignore_conflicts=True)
+        # bulk_create не шлёт сигналов, которые сбрасывают кеш подписок.
+        forget_following(*{user_id for user_id, _ in follows})
+
+    def make_comments(self, count, user_ids, alpha):
+        post_ids = list(Post.objects.order_by('-pub_date')
+                        .values_list('pk', flat=True))
+        if not post_ids or not count:
+            return
+        post_weights = power_law_weights(len(post_ids), alpha)
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            posts = self.rng.choices(post_ids, cum_weights=post_weights,
+                                     k=size)
+            Comment.objects.bulk_create(
+                Comment(post_id=post_id,
+                        author_id=self.rng.choice(user_ids),
+                        text=random_text(self.rng, length=8))
+                for post_id in posts)
+        self.stdout.write(f'Comment: {count}')
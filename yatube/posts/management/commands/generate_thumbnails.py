@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def build(post_id):
+    try:
+        thumbnails.generate(post_id)
+        return True
+    except Exception:
+        thumbnails.logger.exception(
+            'Не удалось построить миниатюру поста %s', post_id)
+        return False
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Параллельно строит миниатюры для уже загруженных картинок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.THUMBNAIL_WORKERS)
+        parser.add_argument('--force', action='store_true',
+                            help='Перестроить и готовые миниатюры.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['force']:
+            posts = posts.filter(thumbnail='')
+        post_ids = list(posts.values_list('pk', flat=True))
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(build, post_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово миниатюр: {sum(results)}, '
+            f'ошибок: {results.count(False)}'))
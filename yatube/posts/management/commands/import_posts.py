@@ -0,0 +1,210 @@
+import hashlib
+import itertools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import caching, counters, feed, search
+from posts.models import Group, ImportCheckpoint, Post
+from posts.transfer import FORMATS, Throughput, detect_format, read_records
+from posts.utils import explicit_dates
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты из NDJSON или CSV пачками через bulk_create. '
+            'Позиция хранится в БД в одной транзакции с пачкой, поэтому '
+            'после сбоя повторный запуск продолжает с места остановки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--job', help='Имя задачи для продолжения; '
+                                          'по умолчанию — путь к файлу.')
+        parser.add_argument('--images-dir',
+                            help='Откуда копировать картинки (пути '
+                                 'в записях — относительно этой папки).')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Потоки копирования картинок.')
+        parser.add_argument('--create-authors', action='store_true')
+        parser.add_argument('--create-groups', action='store_true')
+        parser.add_argument('--restart', action='store_true',
+                            help='Начать источник заново.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        job = options['job'] or (path != '-' and os.path.abspath(path))
+        if not job:
+            raise CommandError('Для чтения из stdin укажите --job.')
+        self.options = options
+        self.authors = {}
+        self.groups = {}
+        self.skipped = 0
+        self.images = 0
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=job)
+        if options['restart']:
+            checkpoint.position = 0
+            checkpoint.save()
+        fmt = detect_format(path, options['format'])
+        if path == '-':
+            self.run(sys.stdin, fmt, checkpoint)
+        else:
+            with open(path, encoding='utf-8', newline='') as file:
+                self.run(file, fmt, checkpoint)
+
+    def run(self, file, fmt, checkpoint):
+        records = read_records(file, fmt)
+        if checkpoint.position:
+            self.stderr.write(f'Продолжаем с записи {checkpoint.position}')
+            records = itertools.islice(records, checkpoint.position, None)
+        throughput = Throughput()
+        pub_date = Post._meta.get_field('pub_date')
+        with ThreadPoolExecutor(self.options['workers']) as pool, \
+                explicit_dates(pub_date):
+            while True:
+                batch = list(itertools.islice(
+                    records, self.options['batch_size']))
+                if not batch:
+                    break
+                self.import_batch(batch, checkpoint, pool)
+                throughput.add(len(batch))
+                self.stderr.write(str(throughput))
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано: {throughput}; пропущено: {self.skipped}, '
+            f'картинок: {self.images}'))
+        if self.images:
+            self.stdout.write('Миниатюры: manage.py generate_thumbnails')
+
+    def import_batch(self, records, checkpoint, pool):
+        position = checkpoint.position
+        checkpoint.position += len(records)
+        valid = []
+        for number, record in enumerate(records, position + 1):
+            error = self.validate(record)
+            if error:
+                self.skipped += 1
+                self.stderr.write(f'Запись {number}: {error}, пропущена')
+            else:
+                valid.append((number, record))
+        records = [record for _, record in valid]
+        authors = self.resolve(
+            self.authors, {record['author'] for record in records},
+            User, 'username', self.options['create_authors'],
+            lambda name: User(username=name, password='!'))
+        groups = self.resolve(
+            self.groups, {record['group'] for record in records
+                          if record.get('group')},
+            Group, 'slug', self.options['create_groups'],
+            lambda slug: Group(title=slug, slug=slug))
+        images = list(pool.map(self.copy_image, records))
+        if self.options['images_dir']:
+            self.images += sum(bool(image) for image in images)
+        posts = []
+        for (number, record), image in zip(valid, images):
+            author_id = authors.get(record['author'])
+            if author_id is None:
+                self.skipped += 1
+                self.stderr.write(
+                    f'Запись {number}: '
+                    f'нет автора {record["author"]!r}, пропущена')
+                continue
+            posts.append(Post(
+                author_id=author_id,
+                group_id=groups.get(record.get('group')),
+                text=record['text'],
+                pub_date=self.parse_date(record.get('pub_date')),
+                image=image))
+        with transaction.atomic():
+            # Позиция пишется первой: на SQLite эта запись берёт блокировку
+            # БД, и чужие посты до коммита между нашими id не появятся.
+            checkpoint.save()
+            created = self.create_posts(posts)
+            # bulk_create не шлёт сигналы: индекс, счётчики и ленты
+            # обновляем здесь же.
+            search.index_posts((post.pk, post.text) for post in created)
+            counters.reconcile_users(
+                list({post.author_id for post in created}))
+            feed.fan_out_new([post.pk for post in created])
+            transaction.on_commit(lambda: caching.authors_changed(
+                {post.author_id for post in created},
+                {post.group_id for post in created}))
+
+    def create_posts(self, posts):
+        """Вставляет посты и возвращает их с id."""
+        if connection.features.can_return_ids_from_bulk_insert:
+            return Post.objects.bulk_create(posts)
+        # SQLite id не отдаёт: берём всё, что вставлено после
+        # последнего id, — блокировка записи уже у этой транзакции.
+        last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        Post.objects.bulk_create(posts)
+        return list(Post.objects.filter(pk__gt=last_pk).only(
+            'pk', 'text', 'author_id', 'group_id', 'pub_date'))
+
+    def validate(self, record):
+        """Причина, по которой запись нельзя загрузить, или None."""
+        if not isinstance(record, dict):
+            return 'не объект JSON'
+        for field in ('author', 'text'):
+            if not isinstance(record.get(field), str) or not record[field]:
+                return f'нет поля {field!r}'
+        for field in ('group', 'image', 'pub_date'):
+            if not isinstance(record.get(field) or '', str):
+                return f'поле {field!r} не строка'
+        return None
+
+    def resolve(self, known, keys, model, field, create, make):
+        """id по ключам; в БД ходим только за ещё не виденными."""
+        missing = keys - known.keys()
+        if missing:
+            found = dict(model.objects.filter(**{f'{field}__in': missing})
+                         .values_list(field, 'pk'))
+            if create and len(found) < len(missing):
+                model.objects.bulk_create(
+                    [make(key) for key in missing - found.keys()],
+                    ignore_conflicts=True)
+                found = dict(model.objects
+                             .filter(**{f'{field}__in': missing})
+                             .values_list(field, 'pk'))
+            known.update(found)
+        return {key: known[key] for key in keys if key in known}
+
+    def copy_image(self, record):
+        image = record.get('image') or ''
+        images_dir = self.options['images_dir']
+        if not image or not images_dir:
+            return image
+        source = os.path.join(images_dir, image)
+        if not os.path.exists(source):
+            self.stderr.write(f'Нет картинки {source}, пост без неё')
+            return ''
+        with open(source, 'rb') as file:
+            digest = hashlib.md5()
+            for chunk in iter(lambda: file.read(1 << 16), b''):
+                digest.update(chunk)
+            # Имя по содержимому: при повторе пачки после сбоя файл
+            # уже лежит в хранилище и второй раз не копируется.
+            name = (f'posts/{digest.hexdigest()[:16]}_'
+                    f'{os.path.basename(image)}')
+            if default_storage.exists(name):
+                return name
+            file.seek(0)
+            return default_storage.save(name, File(file))
+
+    def parse_date(self, value):
+        pub_date = parse_datetime(value) if value else None
+        if pub_date is None:
+            return timezone.now()
+        if timezone.is_naive(pub_date):
+            return timezone.make_aware(pub_date, timezone.utc)
+        return pub_date
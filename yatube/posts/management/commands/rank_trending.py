@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг «Популярное» (posts.trending). '
+            'Запускается по расписанию или сам с --every.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--every', type=float,
+                            help='Пересчитывать раз в столько секунд, '
+                                 'пока команду не остановят.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            total = trending.rank(batch_size=options['batch_size'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'В рейтинге {total} постов, {elapsed:.1f} с'))
+            if not options['every']:
+                break
+            time.sleep(max(options['every'] - elapsed, 0))
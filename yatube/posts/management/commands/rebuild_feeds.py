@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import caching, feed
+from posts.utils import batches
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает материализованные ленты подписок. Посты авторов, '
+            'у которых подписчиков больше FEED_FANOUT_LIMIT, в ленты '
+            'не кладутся; когда автор опускается до порога, его посты '
+            'раскладывает задача posts.materialize_author.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*',
+                            help='По умолчанию — все пользователи.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько лент пересобирать в одной '
+                                 'транзакции.')
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        rebuilt = 0
+        for pks in batches(users, options['batch_size']):
+            with transaction.atomic():
+                for user in User.objects.filter(pk__in=pks):
+                    feed.rebuild(user)
+            # Страницы и ETag лент подписок этих пользователей устарели.
+            caching.bump([caching.follow_scope(pk) for pk in pks])
+            rebuilt += len(pks)
+            self.stdout.write(f'Пересобрано лент: {rebuilt}')
+        self.stdout.write(self.style.SUCCESS(f'Готово, лент: {rebuilt}'))
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+from posts.models import Post
+from posts.utils import batches
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с данными и чинит расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed_users = sum(
+            counters.reconcile_users(pks)
+            for pks in batches(User.objects.all(), batch_size))
+        fixed_posts = sum(
+            self.reconcile_posts(pks)
+            for pks in batches(Post.objects.all(), batch_size))
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено пользователей: {fixed_users}, '
+            f'постов: {fixed_posts}'))
+
+    @transaction.atomic
+    def reconcile_posts(self, pks):
+        actual = counters.count_comments(pks)
+        changed = []
+        for post in Post.objects.filter(pk__in=pks).only('comment_count'):
+            comment_count = actual.get(post.pk, 0)
+            if post.comment_count != comment_count:
+                post.comment_count = comment_count
+                changed.append(post)
+        Post.objects.bulk_update(changed, ['comment_count'])
+        return len(changed)
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Рейтинг пересчитывается поколениями; старые строки — производные
+    данные, их заполнит следующий rank_trending."""
+
+    dependencies = [
+        ('posts', '0019_trendingscore'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='TrendingScore',
+        ),
+        migrations.CreateModel(
+            name='TrendingRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField(auto_now_add=True, verbose_name='Начат')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Закончен')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.PositiveIntegerField(verbose_name='Пересчёт')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['generation', 'score', 'post'], name='posts_trend_generat_9bdad1_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendingscore',
+            constraint=models.UniqueConstraint(fields=('generation', 'post'), name='unique_trending_score'),
+        ),
+    ]
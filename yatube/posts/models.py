@@ -1,3 +1,5 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -42,6 +44,7 @@ class Post(models.Model):
         related_name='posts',
         blank=False,
         null=False,
+        db_index=False,
         verbose_name='Автор поста',
         help_text='Добавляется автоматически при опубликовании поста')
     group = models.ForeignKey(
@@ -50,6 +53,7 @@ class Post(models.Model):
         null=True,
         on_delete=models.SET_NULL,
         related_name='posts',
+        db_index=False,
         verbose_name='Группа, к которой относится пост',
         help_text='Выберите группу для Вашего поста, это по Вашему желанию')
     image = models.ImageField(
@@ -57,12 +61,38 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Адрес миниатюры',
+        help_text='Заполняется фоновым пулом (posts.thumbnails)')
+    image_variants = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Варианты картинки',
+        help_text='JSON-манифест адресов и ширин (posts.thumbnails)')
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев')
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def variants(self):
+        return json.loads(self.image_variants) if self.image_variants else {}
+
     class Meta():
         ordering = ('-pub_date', )
+        # Ленты группы и автора читаются по (группа|автор, дата, id)
+        # обратным проходом индекса, без сортировки во временной
+        # таблице; отдельные индексы внешних ключей — префиксы этих.
+        indexes = [
+            models.Index(fields=['group', 'pub_date', 'id']),
+            models.Index(fields=['author', 'pub_date', 'id']),
+        ]
 
 
 class Comment(models.Model):
@@ -95,6 +125,9 @@ class Comment(models.Model):
                                               'автоматически '
                                               'при опубликовании'))
 
+    class Meta:
+        indexes = [models.Index(fields=['post', 'created'])]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -109,7 +142,8 @@ class Follow(models.Model):
         blank=False,
         null=False,
         on_delete=models.CASCADE,
-        related_name='following'
+        related_name='following',
+        db_index=False
     )
 
     class Meta:
@@ -117,3 +151,112 @@ class Follow(models.Model):
             fields=['user', 'author'],
             name='unique_follow'
         )]
+        # Подписчики автора (раскладка постов по лентам) — из индекса.
+        indexes = [models.Index(fields=['author', 'user'])]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, чтобы не считать их COUNT(*) при каждом
+    показе. Поддерживаются сигналами, сверяются reconcile_counters."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов')
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков')
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок')
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель ленты'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации поста')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'],
+            name='unique_feed_entry'
+        )]
+        indexes = [
+            models.Index(fields=['user', 'pub_date', 'post']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника уже импортировано (import_posts).
+
+    Обновляется в одной транзакции с пачкой постов, поэтому после сбоя
+    импорт продолжается ровно с первой незаписанной записи.
+    """
+    source = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Источник'
+    )
+    position = models.BigIntegerField(
+        default=0,
+        verbose_name='Импортировано записей')
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено')
+
+
+class TrendingRanking(models.Model):
+    """Пересчёт рейтинга «Популярное» (posts.trending).
+
+    id — поколение строк TrendingScore. Страница читает последний
+    законченный пересчёт, пока следующий пишется пачками рядом.
+    """
+    started = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Начат')
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Закончен')
+
+
+class TrendingScore(models.Model):
+    """Рейтинг поста в одном пересчёте «Популярного»."""
+    generation = models.PositiveIntegerField(verbose_name='Пересчёт')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    score = models.FloatField(verbose_name='Рейтинг')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['generation', 'post'],
+            name='unique_trending_score'
+        )]
+        indexes = [models.Index(fields=['generation', 'score', 'post'])]
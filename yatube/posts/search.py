@@ -0,0 +1,148 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite индекс — таблица FTS5 posts_post_fts (rowid = id поста),
+в которую кладутся основы слов текста (posts.stemmer): своего русского
+стеммера у FTS5 нет. Таблица обновляется сигналами сохранения
+и удаления поста. На PostgreSQL используется tsvector с конфигурацией
+russian и GIN-индекс по тому же выражению, что строит SearchVector,
+поэтому синхронизировать ничего не нужно.
+
+Результаты упорядочены по релевантности (score, больше — лучше)
+и листаются курсором по (score, id), как остальные ленты.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector)
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .stemmer import WORD_RE, stem, stem_text
+from .utils import CURSOR_NEXT, CursorPaginator, keyset, parse_score
+
+FTS_TABLE = 'posts_post_fts'
+SEARCH_CONFIG = 'russian'
+
+
+class RawSubquery(RawSQL):
+    """RawSQL для фильтра pk__in, но без собственных скобок.
+
+    Иначе получается IN ((SELECT ...)), и SQLite считает подзапрос
+    скалярным: из него берётся только первая строка.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def uses_fts5(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite'
+
+
+def index_posts(posts, using=DEFAULT_DB_ALIAS):
+    """Заносит в индекс пары (id, текст); старые записи заменяются."""
+    if not uses_fts5(using):
+        return
+    rows = [(pk, stem_text(text)) for pk, text in posts]
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk, _ in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)', rows)
+
+
+def reindex(queryset, batch_size=5000):
+    """Заносит в индекс посты queryset пачками по id."""
+    last_pk = 0
+    while True:
+        rows = list(queryset
+                    .filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .values_list('pk', 'text')[:batch_size])
+        if not rows:
+            return
+        index_posts(rows, queryset.db)
+        last_pk = rows[-1][0]
+
+
+def unindex_post(post_id, using=DEFAULT_DB_ALIAS):
+    if not uses_fts5(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def match_expression(text):
+    """Запрос FTS5: все слова запроса, каждое — по префиксу основы."""
+    return ' '.join(f'"{stem(word)}"*' for word in WORD_RE.findall(text))
+
+
+def tsquery(text):
+    """Сырой tsquery PostgreSQL с тем же смыслом, что match_expression."""
+    return ' & '.join(f'{word}:*' for word in WORD_RE.findall(text))
+
+
+def postgres_matches(queryset, text):
+    query = SearchQuery(tsquery(text), config=SEARCH_CONFIG,
+                        search_type='raw')
+    vector = SearchVector('text', config=SEARCH_CONFIG)
+    return (queryset
+            .annotate(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_score=Cast(SearchRank(vector, query),
+                                        FloatField())))
+
+
+def matching_ids(text, using=DEFAULT_DB_ALIAS):
+    """Подзапрос id найденных постов — для фильтра pk__in."""
+    if uses_fts5(using):
+        return RawSubquery(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [match_expression(text)])
+    from .models import Post
+    return postgres_matches(Post.objects.using(using), text).values('pk')
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная выдача поиска: сначала самые релевантные посты."""
+
+    date_field = 'search_score'
+    parse_key = staticmethod(parse_score)
+
+    def __init__(self, text, object_list, per_page):
+        super().__init__(object_list, per_page)
+        self.text = text
+
+    def fetch(self, cursor, limit):
+        if not WORD_RE.search(self.text):
+            return []
+        using = self.object_list.db
+        if not uses_fts5(using):
+            return list(keyset(postgres_matches(self.object_list, self.text),
+                               cursor, self.date_field)[:limit])
+        # rank у FTS5 — bm25 со знаком минус: меньше — релевантнее.
+        sql = (f'SELECT rowid, -rank FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s')
+        params = [match_expression(self.text)]
+        order = 'rank, rowid DESC'
+        if cursor is not None:
+            direction, score, pk = cursor
+            if direction == CURSOR_NEXT:
+                sql += ' AND (-rank, rowid) < (%s, %s)'
+            else:
+                sql += ' AND (-rank, rowid) > (%s, %s)'
+                order = 'rank DESC, rowid'
+            params += [score, pk]
+        with connections[using].cursor() as db_cursor:
+            db_cursor.execute(f'{sql} ORDER BY {order} LIMIT %s',
+                              params + [limit])
+            rows = db_cursor.fetchall()
+        posts = self.object_list.in_bulk([pk for pk, _ in rows])
+        found = []
+        for pk, score in rows:
+            if pk in posts:
+                posts[pk].search_score = score
+                found.append(posts[pk])
+        return found
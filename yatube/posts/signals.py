@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import caching, counters, feed, follows, search, tasks, thumbnails
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # Запоминаем исходные группу и картинку, чтобы заметить их смену.
+    instance.initial_group_id = instance.__dict__.get('group_id')
+    instance.initial_image = str(instance.__dict__.get('image') or '')
+
+
+@receiver(post_init, sender=Group)
+def group_loaded(sender, instance, **kwargs):
+    instance.initial_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(instance.author_id, 'posts_count', 1)
+        tasks.fan_out.enqueue(key=f'fan_out:{instance.pk}',
+                              post_id=instance.pk)
+    if (instance.image.name or '') != instance.initial_image:
+        if instance.thumbnail or instance.image_variants:
+            instance.thumbnail = instance.image_variants = ''
+            Post.objects.filter(pk=instance.pk).update(
+                thumbnail='', image_variants='')
+        thumbnails.schedule(instance)
+    tasks.index.enqueue(post_id=instance.pk)
+    if created:
+        # Ленты подписчиков сбросит задача fan_out, после раскладки.
+        caching.post_created(instance)
+    else:
+        caching.post_changed(
+            instance, {instance.initial_group_id, instance.group_id})
+    instance.initial_group_id = instance.group_id
+    instance.initial_image = instance.image.name or ''
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, using, **kwargs):
+    counters.bump(instance.author_id, 'posts_count', -1)
+    search.unindex_post(instance.pk, using)
+    caching.post_changed(instance, {instance.group_id})
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+    caching.bump([caching.comments_scope(instance.post_id)])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    caching.bump([caching.comments_scope(instance.post_id)])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    caching.group_changed(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(instance.author_id, 'followers_count', 1)
+        counters.bump(instance.user_id, 'following_count', 1)
+        tasks.backfill.enqueue(user_id=instance.user_id,
+                               author_id=instance.author_id)
+    follows.forget_following(instance.user_id)
+    caching.follow_changed(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, 'followers_count', -1)
+    counters.bump(instance.user_id, 'following_count', -1)
+    if UserStats.objects.filter(
+            user_id=instance.author_id,
+            followers_count=settings.FEED_FANOUT_LIMIT).exists():
+        # Автор только что перестал быть популярным: его посты теперь
+        # читаются только из материализованных лент.
+        tasks.materialize_author.enqueue(author_id=instance.author_id)
+    feed.prune(instance.user, instance.author)
+    follows.forget_following(instance.user_id)
+    caching.follow_changed(instance)
@@ -0,0 +1,112 @@
+"""Стеммер Snowball для русского языка.
+
+Нужен полнотекстовому поиску на SQLite: токенизаторы FTS5 не умеют
+русскую морфологию, поэтому в индекс и в запрос попадают уже
+обрезанные до основы слова. Алгоритм:
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+import re
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+WORD_RE = re.compile(r'\w+')
+
+PERFECTIVE_GERUND = (('в', 'вши', 'вшись'),
+                     ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'))
+ADJECTIVE = ((), ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый',
+                  'ой', 'ем', 'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому',
+                  'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'))
+PARTICIPLE = (('ем', 'нн', 'вш', 'ющ', 'щ'), ('ивш', 'ывш', 'ующ'))
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+         'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'),
+        ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+         'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+         'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'))
+NOUN = ((), ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи',
+             'ии', 'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием',
+             'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию',
+             'ью', 'ю', 'ия', 'ья', 'я'))
+SUPERLATIVE = ((), ('ейш', 'ейше'))
+DERIVATIONAL = ((), ('ост', 'ость'))
+MAX_ENDING = 6
+
+
+def strip_ending(word, groups):
+    """Отрезает самое длинное окончание из groups или возвращает None.
+
+    Окончания первой группы снимаются, только если перед ними а или я.
+    """
+    dependent, independent = groups
+    for size in range(min(len(word), MAX_ENDING), 0, -1):
+        ending = word[-size:]
+        if ending in independent:
+            return word[:-size]
+        if ending in dependent:
+            stem = word[:-size]
+            return stem if stem.endswith(('а', 'я')) else None
+    return None
+
+
+def strip_adjectival(word):
+    stem = strip_ending(word, ADJECTIVE)
+    if stem is None:
+        return None
+    return strip_ending(stem, PARTICIPLE) or stem
+
+
+def regions(word):
+    """Начала областей RV и R2."""
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS),
+              len(word))
+    r1 = r2 = len(word)
+    for i in range(1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = regions(word)
+    head, tail = word[:rv], word[rv:]
+
+    stripped = strip_ending(tail, PERFECTIVE_GERUND)
+    if stripped is None:
+        tail = strip_ending(tail, REFLEXIVE) or tail
+        for step in (strip_adjectival,
+                     lambda part: strip_ending(part, VERB),
+                     lambda part: strip_ending(part, NOUN)):
+            stripped = step(tail)
+            if stripped is not None:
+                break
+    if stripped is not None:
+        tail = stripped
+
+    if tail.endswith('и'):
+        tail = tail[:-1]
+
+    stripped = strip_ending(tail, DERIVATIONAL)
+    if stripped is not None and rv + len(stripped) >= r2:
+        tail = stripped
+
+    if tail.endswith('нн'):
+        tail = tail[:-1]
+    else:
+        stripped = strip_ending(tail, SUPERLATIVE)
+        if stripped is not None:
+            tail = stripped[:-1] if stripped.endswith('нн') else stripped
+        elif tail.endswith('ь'):
+            tail = tail[:-1]
+    return head + tail
+
+
+def stem_text(text):
+    """Текст в виде основ слов через пробел."""
+    return ' '.join(stem(word) for word in WORD_RE.findall(text))
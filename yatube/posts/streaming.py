@@ -0,0 +1,36 @@
+"""Потоковая отдача длинных списков постов.
+
+Страница рендерится кусками: сначала шапка (всё до места списка),
+затем посты пачками по мере чтения queryset.iterator(), затем хвост.
+Первый байт уходит сразу, а в памяти держится одна пачка строк
+из БД, а не весь список и не вся страница.
+"""
+from django.http import StreamingHttpResponse
+from django.template import loader
+from django.utils.safestring import mark_safe
+
+# Место списка в шаблоне; шаблон выводит его вместо цикла по постам.
+STREAM_MARKER = mark_safe('<!-- stream: posts -->')
+ITEM_TEMPLATE = 'posts/includes/stream_post.html'
+CHUNK_SIZE = 200
+# Сколько постов отдаётся одним куском ответа.
+FLUSH_EVERY = 20
+
+
+def stream_posts(request, template_name, context, posts):
+    page = loader.render_to_string(
+        template_name, {**context, 'stream_marker': STREAM_MARKER}, request)
+    head, tail = page.split(STREAM_MARKER, 1)
+    item = loader.get_template(ITEM_TEMPLATE)
+
+    def chunks():
+        yield head
+        batch = []
+        for post in posts.iterator(chunk_size=CHUNK_SIZE):
+            batch.append(item.render({'post': post}))
+            if len(batch) == FLUSH_EVERY:
+                yield ''.join(batch)
+                batch = []
+        yield ''.join(batch) + tail
+
+    return StreamingHttpResponse(chunks())
@@ -0,0 +1,53 @@
+"""Фоновые задачи постов (core.tasks).
+
+Обработчики перечитывают данные по id: к моменту выполнения пост
+могли удалить, а подписку — отменить.
+"""
+from django.contrib.auth import get_user_model
+
+from core.tasks import task
+
+from . import caching, feed, search
+from .models import Follow, Post
+
+User = get_user_model()
+
+
+@task('posts.fan_out')
+def fan_out(post_id):
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None:
+        return
+    feed.fan_out(post)
+    caching.post_fanned_out(post)
+
+
+@task('posts.backfill')
+def backfill(user_id, author_id):
+    follow = (Follow.objects
+              .select_related('user', 'author')
+              .filter(user_id=user_id, author_id=author_id)
+              .first())
+    if follow is None:
+        return
+    feed.backfill(follow.user, follow.author)
+    caching.follow_changed(follow)
+
+
+@task('posts.materialize_author')
+def materialize_author(author_id):
+    author = User.objects.filter(pk=author_id).first()
+    if author is None:
+        return
+    feed.materialize(author)
+    caching.bump([caching.author_posts_scope(author_id)])
+
+
+@task('posts.index', batch=True)
+def index(batch):
+    post_ids = {kwargs['post_id'] for kwargs in batch}
+    texts = dict(Post.objects.filter(pk__in=post_ids)
+                 .values_list('pk', 'text'))
+    search.index_posts(texts.items())
+    for post_id in post_ids - texts.keys():
+        search.unindex_post(post_id)
@@ -0,0 +1,12 @@
+from django import template
+
+from posts.follows import following_ids
+
+register = template.Library()
+
+
+@register.filter
+def followed(author_id, request):
+    """{% if post.author_id|followed:request %}: подписан ли на автора
+    пользователь запроса; подписки грузятся один раз на запрос."""
+    return author_id in following_ids(request)
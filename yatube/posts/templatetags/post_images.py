@@ -0,0 +1,22 @@
+from django import template
+
+register = template.Library()
+
+# Лента занимает всю ширину экрана на телефонах и 960px на десктопе.
+IMAGE_SIZES = '(min-width: 992px) 960px, 100vw'
+
+
+def srcset(variants):
+    return ', '.join(f'{url} {width}w' for url, width in variants or ())
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post):
+    """Картинка поста с srcset из заранее построенных вариантов."""
+    variants = post.variants
+    return {
+        'post': post,
+        'sizes': IMAGE_SIZES,
+        'webp_srcset': srcset(variants.get('webp')),
+        'jpeg_srcset': srcset(variants.get('jpeg')),
+    }
@@ -1,5 +1,8 @@
+import shutil
+import tempfile
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
@@ -33,7 +36,7 @@ class TestPostCreateForm(TestCase):
         )
 
         cls.uploaded_pic = SimpleUploadedFile(
-            name='small_gif',
+            name='small.gif',
             content=small_gif,
             content_type='image/gif'
         )
@@ -50,16 +53,19 @@ class TestPostCreateForm(TestCase):
             'text': 'test text1',
             'group': self.group.id,
             'image': self.uploaded_pic}
-        self.auth_user.post(
-            reverse('posts:post_create'),
-            data=form_data,
-            follow=True)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            self.auth_user.post(
+                reverse('posts:post_create'),
+                data=form_data,
+                follow=True)
         post = Post.objects.first()
         self.assertEqual(Post.objects.count(), post_count + 1)
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.group.id, form_data['group'])
         self.assertEqual(post.author.username, self.user.username)
-        self.assertEqual(post.image, self.post.image)
+        self.assertTrue(post.image.name.startswith('posts/small'))
 
     def test_guest_post(self):
         """ Пост при отсутсвии авторизации """
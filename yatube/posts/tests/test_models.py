@@ -1,7 +1,16 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
-from ..models import Group, Post
+from .. import feed
+from ..models import Comment, FeedEntry, Follow, Group, Post, UserStats
 
 User = get_user_model()
 
@@ -28,3 +37,179 @@ class PostModelTest(TestCase):
         for field, expected_value in group_and_post_fields.items():
             with self.subTest(field=field):
                 self.assertEqual(str(field), expected_value)
+
+
+class CountersTest(TestCase):
+    """Денормализованные счётчики"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении"""
+        post = Post.objects.create(author=self.user, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        post.refresh_from_db()
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 1)
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        stats.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(stats.followers_count, 0)
+        post.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 0)
+
+    def test_reconcile_counters(self):
+        """reconcile_counters исправляет расхождения"""
+        post = Post.objects.create(author=self.user, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        UserStats.objects.filter(user=self.user).update(posts_count=7)
+        UserStats.objects.filter(user=self.reader).delete()
+        Post.objects.filter(pk=post.pk).update(comment_count=0)
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).posts_count, 1)
+        self.assertTrue(UserStats.objects.filter(user=self.reader).exists())
+
+
+class GenerateDataTest(TestCase):
+    """Синтетические данные для нагрузочных тестов"""
+
+    def test_generate_data(self):
+        call_command('generate_data', users=30, groups=3, posts=400,
+                     comments=100, follows=5, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 400)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts_count', flat=True)),
+            400)
+        self.assertEqual(
+            FeedEntry.objects.count(),
+            sum(Post.objects.filter(author=follow.author).count()
+                for follow in Follow.objects.all()))
+        dates = Post.objects.values_list('pub_date', flat=True)
+        self.assertGreater(max(dates) - min(dates), timedelta(days=1))
+
+
+class TransferTest(TestCase):
+    """Выгрузка и загрузка постов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(5):
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {i}')
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def roundtrip(self, name, **options):
+        path = os.path.join(self.dir, name)
+        call_command('export_posts', path, stderr=StringIO())
+        exported = list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'group', 'author'))
+        Post.objects.all().delete()
+        call_command('import_posts', path, batch_size=2, stdout=StringIO(),
+                     stderr=StringIO(), **options)
+        return path, exported
+
+    def test_ndjson_roundtrip(self):
+        _, exported = self.roundtrip('posts.ndjson')
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'text', 'pub_date', 'group', 'author')), exported)
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 5)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         5)
+
+    def test_csv_resume_after_crash(self):
+        """После сбоя импорт продолжается без дублей"""
+        path = os.path.join(self.dir, 'posts.csv')
+        call_command('export_posts', path, stderr=StringIO())
+        Post.objects.all().delete()
+        fan_out_new = feed.fan_out_new
+        calls = []
+
+        def crash_on_second_batch(post_ids):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            fan_out_new(post_ids)
+
+        with mock.patch.object(feed, 'fan_out_new', crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                call_command('import_posts', path, batch_size=2,
+                             stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        call_command('import_posts', path, batch_size=2,
+                     stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            [f'Пост {i}' for i in range(5)])
+
+    def test_unknown_authors(self):
+        path = os.path.join(self.dir, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"author": "new", "group": "new-group", '
+                       '"text": "Привет"}\n')
+        call_command('import_posts', path, stdout=StringIO(),
+                     stderr=StringIO())
+        self.assertFalse(Post.objects.filter(text='Привет').exists())
+        call_command('import_posts', path, restart=True, create_authors=True,
+                     create_groups=True, stdout=StringIO(), stderr=StringIO())
+        post = Post.objects.get(text='Привет')
+        self.assertEqual(post.author.username, 'new')
+        self.assertEqual(post.group.slug, 'new-group')
+
+    def test_invalid_records_reported(self):
+        path = os.path.join(self.dir, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"text": "без автора"}\n'
+                       'не json\n'
+                       '{"author": "author", "text": 5}\n'
+                       '{"author": "author", "text": "Годная"}\n')
+        stderr = StringIO()
+        call_command('import_posts', path, stdout=StringIO(), stderr=stderr)
+        self.assertTrue(Post.objects.filter(text='Годная').exists())
+        for number in (1, 2, 3):
+            self.assertIn(f'Запись {number}:', stderr.getvalue())
+
+    def test_images_not_copied_twice(self):
+        """Повтор загрузки не плодит копии картинок"""
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        images = os.path.join(os.path.dirname(__file__), 'test_image')
+        path = os.path.join(self.dir, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"author": "author", "text": "С картинкой", '
+                       '"image": "1.jpeg"}\n')
+        with override_settings(MEDIA_ROOT=media):
+            for options in ({}, {'restart': True}):
+                call_command('import_posts', path, images_dir=images,
+                             stdout=StringIO(), stderr=StringIO(),
+                             **options)
+        self.assertEqual(len(os.listdir(os.path.join(media, 'posts'))), 1)
+        names = set(Post.objects.filter(text='С картинкой')
+                    .values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..feed import FeedPaginator
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def explain(sql):
+    """План запроса построчно; на PostgreSQL без seq scan по умолчанию,
+    иначе на крошечных тестовых таблицах индексы не выбираются."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def bad_steps(plan):
+    """Шаги плана с полным просмотром таблицы или сортировкой."""
+    if connection.vendor == 'postgresql':
+        return [step for step in plan
+                if 'Seq Scan' in step or step.lstrip(' ->').startswith(
+                    ('Sort', 'Incremental Sort'))]
+    # Просмотр результата подзапроса из FROM (co-routine) — не таблицы.
+    subqueries = {step.split()[-1] for step in plan
+                  if step.startswith(('CO-ROUTINE ', 'MATERIALIZE '))}
+    return [step for step in plan
+            if step.startswith('USE TEMP B-TREE')
+            or (step.startswith('SCAN ') and ' USING ' not in step
+                and step.split()[1] not in subqueries)]
+
+
+class QueryPlanTest(TestCase):
+    """Запросы лент идут по индексам, без полных просмотров и сортировок"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        posts = [Post.objects.create(author=cls.author, group=cls.group,
+                                     text=f'Пост {i}') for i in range(3)]
+        cls.post = posts[0]
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def assert_indexed(self, sql):
+        plan = explain(sql)
+        self.assertFalse(bad_steps(plan), f'{sql}\n' + '\n'.join(plan))
+
+    def assert_view_indexed(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                self.assert_indexed(query['sql'])
+        return response
+
+    def assert_pages_indexed(self, url):
+        page_obj = self.assert_view_indexed(url).context['page_obj']
+        self.assertTrue(page_obj.next_cursor)
+        self.assert_view_indexed(url, cursor=page_obj.next_cursor)
+
+    @override_settings(COUNT_POST=1)
+    def test_feeds(self):
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=[self.group.slug]),
+                    reverse('posts:profile', args=[self.author.username]),
+                    reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                self.assert_pages_indexed(url)
+
+    @override_settings(COUNT_POST=1, FEED_FANOUT_LIMIT=0)
+    def test_follow_feed_popular_author(self):
+        self.assert_pages_indexed(reverse('posts:follow_index'))
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_follow_feed_many_popular_authors(self):
+        """Посты популярных авторов — одним запросом на любое их число"""
+        for number in range(3):
+            author = User.objects.create(username=f'popular_{number}')
+            Post.objects.create(author=author, text=f'Пост {number}')
+            Follow.objects.create(user=self.reader, author=author)
+        paginator = FeedPaginator(self.reader, Post.objects.all(), 10)
+        with CaptureQueriesContext(connection) as queries:
+            page_obj = paginator.get_cursor_page()
+        self.assertEqual(len(page_obj), 6)
+        # Лента, популярные авторы, их посты и сами посты страницы.
+        self.assertEqual(len(queries), 4)
+        for query in queries.captured_queries:
+            self.assert_indexed(query['sql'])
+
+    def test_post_detail(self):
+        self.assert_view_indexed(
+            reverse('posts:post_detail', args=[self.post.pk]))
+
+    def test_followers(self):
+        """Подписчики автора для раскладки постов по лентам"""
+        followers = Follow.objects.filter(
+            author=self.author).values_list('user', flat=True)
+        self.assert_indexed(str(followers.query))
@@ -1,15 +1,32 @@
-from django.test import TestCase, Client
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
 from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 from django.conf import settings
-
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.cache import cache_lookup
+from posts import caching, thumbnails, trending
+from posts.follows import following_ids
+from posts.groups import get_group
 from posts.forms import PostForm
-from posts.models import Post, Group, Follow
+from posts.models import (
+    Comment, FeedEntry, Follow, Group, Post, TrendingRanking, TrendingScore)
 
 
 User = get_user_model()
+TEST_IMAGE = os.path.join(os.path.dirname(__file__), 'test_image', '1.jpeg')
 
 
 class TestNameNamespace(TestCase):
@@ -114,6 +131,29 @@ class TestPagination(TestCase):
                     len(response.context['page_obj']
                         .paginator.page(2)), second_page)
 
+    def test_cursor_pages(self):
+        """Переход по курсорам вперёд и назад"""
+        first_page = self.auth_user.get(
+            reverse('posts:index')).context['page_obj']
+        self.assertIsNone(first_page.previous_cursor)
+        response = self.auth_user.get(
+            reverse('posts:index'), {'cursor': first_page.next_cursor})
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 4)
+        self.assertIsNone(second_page.next_cursor)
+        self.assertFalse(set(first_page) & set(second_page))
+        response = self.auth_user.get(
+            reverse('posts:index'), {'cursor': second_page.previous_cursor})
+        self.assertEqual(list(response.context['page_obj']),
+                         list(first_page))
+
+    def test_broken_cursor(self):
+        """Испорченный курсор открывает первую страницу"""
+        response = self.auth_user.get(
+            reverse('posts:index'), {'cursor': 'broken!'})
+        self.assertEqual(len(response.context['page_obj']),
+                         settings.COUNT_POST)
+
 
 class TestContext(TestCase):
     """Тестирование наполнения страниц"""
@@ -263,6 +303,283 @@ class TestCache(TestCase):
         response = self.client.get(reverse('posts:index'))
         self.assertNotContains(response, post1.text)
 
+    def test_new_post_resets_cache(self):
+        """Новый пост сразу виден на закешированных лентах"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}))
+        for url in urls:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.user, group=self.group, text='fresh post')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'fresh post')
+
+    def test_post_resets_follow_feed_without_follower_writes(self):
+        """Пост сбрасывает поколение автора, а не ленты подписчиков"""
+        reader = User.objects.create(username='cache_reader')
+        Follow.objects.create(user=reader, author=self.user)
+        self.client.force_login(reader)
+        self.client.get(reverse('posts:follow_index'))
+        with mock.patch('posts.caching.bump',
+                        wraps=caching.bump) as bump:
+            Post.objects.create(author=self.user, text='post for readers')
+        scopes = [scope for call in bump.call_args_list
+                  for scope in call[0][0]]
+        self.assertFalse([scope for scope in scopes
+                          if scope.startswith('follow:')])
+        self.assertContains(self.client.get(reverse('posts:follow_index')),
+                            'post for readers')
+
+    def test_cache_lookups(self):
+        """Повторный запрос ленты берётся из кеша"""
+        lookups = []
+
+        def receiver(name, hit, **kwargs):
+            lookups.append((name, hit))
+
+        cache_lookup.connect(receiver)
+        self.addCleanup(cache_lookup.disconnect, receiver)
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        # При промахе страницы рендерится и её кешируемый фрагмент.
+        self.assertEqual(lookups, [('index', False), ('index_page', False),
+                                   ('index', True)])
+
+
+class TestGroupCache(TestCase):
+    """Кеш сообществ по slug и первых страниц их лент"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='group_cache_author')
+        cls.group = Group.objects.create(title='Коты', slug='cats')
+        cls.other = Group.objects.create(title='Собаки', slug='dogs')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост про котов')
+
+    def setUp(self):
+        cache.clear()
+
+    def group_page(self, slug):
+        return self.client.get(reverse('posts:group_list', args=[slug]))
+
+    def test_group_read_once(self):
+        self.assertEqual(get_group('cats'), self.group)
+        self.assertIsNone(get_group('missing'))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group('cats'), self.group)
+            self.assertIsNone(get_group('missing'))
+
+    def test_group_not_shared(self):
+        """Каждый вызов получает свой экземпляр группы"""
+        group = get_group('cats')
+        group.title = 'Изменено в чужом потоке'
+        cached = get_group('cats')
+        self.assertIsNot(cached, group)
+        self.assertEqual(cached.title, 'Коты')
+        self.assertFalse(cached._state.adding)
+
+    def test_group_changes_reset_cache(self):
+        self.group_page('cats')
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Кошки'
+        group.save()
+        self.assertContains(self.group_page('cats'), 'Кошки')
+        group.slug = 'kittens'
+        group.save()
+        self.assertEqual(self.group_page('cats').status_code, 404)
+        self.assertContains(self.group_page('kittens'), 'Пост про котов')
+        group.delete()
+        self.assertEqual(self.group_page('kittens').status_code, 404)
+
+    def test_moved_post_resets_both_groups(self):
+        """Пост перенесён в другую группу (как из list_editable)"""
+        self.group_page('cats')
+        self.group_page('dogs')
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other
+        post.save()
+        self.assertNotContains(self.group_page('cats'), 'Пост про котов')
+        self.assertContains(self.group_page('dogs'), 'Пост про котов')
+
+    def test_hit_ratios(self):
+        url = reverse('core:cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        get_group('cats')
+        get_group('cats')
+        self.client.force_login(User.objects.create_user(
+            username='group_cache_staff', is_staff=True))
+        stats = self.client.get(url).json()
+        self.assertGreaterEqual(stats['group_info']['hits'], 1)
+        self.assertTrue(0 < stats['group_info']['ratio'] < 1)
+
+
+class TestConditional(TestCase):
+    """Тестирование условных ответов (ETag и 304)"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='etag_author')
+        cls.reader = User.objects.create(username='etag_reader')
+        cls.group = Group.objects.create(title='etag', slug='etag-slug')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='etag post')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+
+    def test_not_modified(self):
+        """Неизменённая страница отдаёт 304 не больше чем за запрос"""
+        for url in self.urls():
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1 if 'posts/' in url else 0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_reset_etag(self):
+        """Новый пост, комментарий и подписка меняют ETag"""
+        etags = {url: self.reader_client.get(url)['ETag']
+                 for url in self.urls()}
+        Post.objects.create(author=self.author, group=self.group,
+                            text='new post')
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='comment')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+        etag = self.reader_client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Отписаться')
+
+    def test_etag_follows_csrf_token(self):
+        """Новый CSRF-токен (вход заново) меняет ETag страницы с формой"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        etag = self.reader_client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        del self.reader_client.cookies[settings.CSRF_COOKIE_NAME]
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_per_user(self):
+        """Гость и пользователь получают разные ETag"""
+        for url in self.urls():
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url)['ETag'],
+                                    self.reader_client.get(url)['ETag'])
+
+
+@override_settings(EDGE_CACHE_ENABLED=True)
+class TestEdgeCache(TestCase):
+    """Тестирование публичных оболочек для фронт-прокси"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='edge_author')
+        cls.reader = User.objects.create(username='edge_reader')
+        cls.post = Post.objects.create(author=cls.author, text='edge post')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_shell_is_public(self):
+        """Оболочка одна на всех и не зависит от cookie"""
+        urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id})}
+        for view_name, url in urls.items():
+            nav = reverse('core:nav_fragment', args=[view_name])
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage', response['Cache-Control'])
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+                self.assertFalse(response.cookies)
+                self.assertNotContains(response, 'edge_reader')
+                self.assertContains(response, f'<esi:include src="{nav}" />')
+                self.assertEqual(response.content,
+                                 self.client.get(url).content)
+
+    def test_fragments(self):
+        """Фрагменты отдают пользовательские куски страницы"""
+        profile = self.reader_client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        url = reverse('posts:follow_fragment', args=[self.author.username])
+        self.assertContains(profile, f'<esi:include src="{url}" />')
+        self.assertContains(self.reader_client.get(url), 'Отписаться')
+        self.assertNotContains(self.client.get(url), 'Отписаться')
+        nav = self.reader_client.get(
+            reverse('core:nav_fragment', args=['posts:post_create']))
+        self.assertContains(nav, 'edge_reader')
+        self.assertContains(nav, 'nav-link active')
+        self.assertIn('no-store', nav['Cache-Control'])
+        tools = self.reader_client.get(
+            reverse('posts:post_tools_fragment', args=[self.post.id]))
+        self.assertContains(tools, 'csrfmiddlewaretoken')
+        self.assertNotContains(tools, 'редактировать запись')
+
+    @override_settings(EDGE_CACHE_ENABLED=False)
+    def test_disabled_renders_inline(self):
+        """Без режима оболочек куски рендерятся на месте"""
+        response = self.reader_client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        self.assertNotContains(response, 'esi:include')
+        self.assertContains(response, 'Отписаться')
+
+
+class TestStreaming(TestCase):
+    """Тестирование потоковых страниц со всеми постами"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='stream_author')
+        cls.group = Group.objects.create(title='stream', slug='stream-slug')
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'streamed {i}')
+            for i in range(settings.COUNT_POST * 3))
+
+    def test_all_posts_streamed(self):
+        """Все посты отдаются одним потоковым ответом"""
+        urls = (
+            reverse('posts:profile_all', args=[self.author.username]),
+            reverse('posts:group_all', args=[self.group.slug]))
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                self.assertEqual(content.count('<article>'),
+                                 settings.COUNT_POST * 3)
+                self.assertIn('</html>', content)
+                self.assertNotIn('stream: posts', content)
+
+    def test_unknown_author(self):
+        response = self.client.get(
+            reverse('posts:profile_all', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
 
 class TestFollow(TestCase):
     """Тестирование подписок"""
@@ -320,3 +637,258 @@ class TestFollow(TestCase):
         response = self.auth_user.get(reverse('posts:follow_index'))
         first_obj = response.context['page_obj'][0]
         self.assertEqual(first_obj.author, self.user)
+
+    def test_unfollow_clears_feed(self):
+        """После отписки посты автора пропадают из ленты"""
+        Follow.objects.create(user=self.user1, author=self.user)
+        Follow.objects.filter(user=self.user1, author=self.user).delete()
+        response = self.auth_user.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_in_feed(self):
+        """Посты популярного автора читаются в ленту на лету"""
+        Follow.objects.create(user=self.user1, author=self.user)
+        post = Post.objects.create(author=self.user, text='popular post')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        response = self.auth_user.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_author_below_limit_materialized(self):
+        """Посты, вышедшие у популярного автора, попадают в ленты,
+        когда подписчиков становится не больше порога"""
+        other = User.objects.create(username='other_follower')
+        Follow.objects.create(user=self.user1, author=self.user)
+        Follow.objects.create(user=other, author=self.user)
+        post = Post.objects.create(author=self.user, text='popular post')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        Follow.objects.filter(user=other, author=self.user).delete()
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.user1, post=post).exists())
+        response = self.auth_user.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+
+    def test_rebuild_resets_follow_page(self):
+        """Пересобранная лента не отдаётся из кеша страниц"""
+        Follow.objects.create(user=self.user1, author=self.user)
+        url = reverse('posts:follow_index')
+        self.auth_user.get(url)
+        # Вставка в обход сигналов: в ленту пост попадёт только
+        # при пересборке.
+        Post.objects.bulk_create([Post(author=self.user, text='вне ленты')])
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertContains(self.auth_user.get(url), 'вне ленты')
+
+    def test_following_ids_once_per_request(self):
+        """Подписки грузятся один раз за запрос и сбрасываются отпиской"""
+        Follow.objects.create(user=self.user1, author=self.user)
+        request = RequestFactory().get('/')
+        request.user = self.user1
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                self.assertIn(self.user.pk, following_ids(request))
+        Follow.objects.filter(user=self.user1, author=self.user).delete()
+        request = RequestFactory().get('/')
+        request.user = self.user1
+        self.assertNotIn(self.user.pk, following_ids(request))
+        response = self.auth_user.get(
+            reverse('posts:profile', args=[self.user.username]))
+        self.assertContains(response, 'Подписаться')
+
+
+class TestComments(TestCase):
+    """Комментарии на странице поста"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='LeonidYacubovic')
+        cls.post = Post.objects.create(author=cls.user, text='test post')
+        cls.other_post = Post.objects.create(
+            author=cls.user, text='other post')
+
+    def setUp(self):
+        self.auth_user = Client()
+        self.auth_user.force_login(self.user)
+
+    def add_comments(self, count, post=None):
+        start = User.objects.count()
+        authors = [User.objects.create(username=f'commentator{start + i}')
+                   for i in range(count)]
+        Comment.objects.bulk_create(
+            Comment(post=post or self.post, author=author, text='comment')
+            for author in authors)
+
+    def test_only_post_comments(self):
+        """Выводятся только комментарии этого поста"""
+        self.add_comments(1, self.other_post)
+        response = self.auth_user.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertEqual(len(response.context['comments']), 0)
+
+    def test_comments_chunks(self):
+        """Комментарии подгружаются порциями"""
+        self.add_comments(settings.COUNT_COMMENTS + 1)
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        comments = self.auth_user.get(url).context['comments']
+        self.assertEqual(len(comments), settings.COUNT_COMMENTS)
+        response = self.auth_user.get(url, {'comments': comments.next_cursor})
+        self.assertEqual(len(response.context['comments']), 1)
+
+    def test_query_count_constant(self):
+        """Число запросов не зависит от числа комментариев"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.add_comments(1)
+        with CaptureQueriesContext(connection) as few:
+            self.auth_user.get(url)
+        self.add_comments(settings.COUNT_COMMENTS * 2)
+        with self.assertNumQueries(len(few)):
+            self.auth_user.get(url)
+
+
+class TestThumbnails(TestCase):
+    """Миниатюры строятся заранее, шаблон берёт готовый адрес"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.settings_override.enable()
+        cls.user = User.objects.create(username='LeonidYacubovic')
+        with open(TEST_IMAGE, 'rb') as image:
+            cls.post = Post.objects.create(
+                author=cls.user, text='test post',
+                image=SimpleUploadedFile('1.jpeg', image.read()))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_thumbnail_in_template(self):
+        """После генерации пост показывает миниатюру"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.assertContains(self.client.get(url), self.post.image.url)
+        thumbnail_url = thumbnails.generate(self.post.id)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail, thumbnail_url)
+        self.assertContains(self.client.get(url), thumbnail_url)
+
+    def test_srcset_variants(self):
+        """Варианты картинки попадают в srcset"""
+        thumbnails.generate(self.post.id)
+        self.post.refresh_from_db()
+        variants = self.post.variants['jpeg']
+        self.assertTrue(variants)
+        response = self.client.get(reverse('posts:index'))
+        for variant_url, width in variants:
+            self.assertContains(response, f'{variant_url} {width}w')
+
+
+class TestSearch(TestCase):
+    """Полнотекстовый поиск по индексу"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='LeonidYacubovic')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Кошки спят. Кошки едят. Кошка играет.')
+        cls.cat = Post.objects.create(
+            author=cls.user, text='Про кошку и собаку')
+        cls.dog = Post.objects.create(
+            author=cls.user, text='Только про собак')
+
+    def search(self, query, **params):
+        return self.client.get(reverse('posts:search'),
+                               {'q': query, **params})
+
+    def test_stemming_and_ranking(self):
+        """Находятся другие формы слова, релевантные посты выше"""
+        page_obj = self.search('кошками').context['page_obj']
+        self.assertEqual(list(page_obj), [self.cats, self.cat])
+
+    def test_all_words_required(self):
+        page_obj = self.search('кошка собаки').context['page_obj']
+        self.assertEqual(list(page_obj), [self.cat])
+
+    def test_index_follows_edits(self):
+        """Индекс обновляется при правке и удалении поста"""
+        dog = Post.objects.get(pk=self.dog.pk)
+        dog.text = 'Теперь про кошек с кошками'
+        dog.save()
+        self.assertIn(dog, self.search('кошка').context['page_obj'])
+        Post.objects.get(pk=self.cats.pk).delete()
+        self.assertNotIn(self.cats,
+                         self.search('кошка').context['page_obj'])
+
+    @override_settings(COUNT_POST=1)
+    def test_cursor_pages(self):
+        first = self.search('кошка').context['page_obj']
+        second = self.search(
+            'кошка', cursor=first.next_cursor).context['page_obj']
+        self.assertEqual(list(first) + list(second), [self.cats, self.cat])
+        self.assertIsNone(second.next_cursor)
+        self.assertContains(self.search('кошка'), 'q=%D0%BA')
+
+    def test_admin_search(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'})
+        self.assertEqual(set(response.context['cl'].result_list),
+                         {self.cat, self.dog})
+
+
+class TestTrending(TestCase):
+    """Рейтинг «Популярное»"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='trending_author')
+        cls.quiet = Post.objects.create(author=cls.user, text='Тихий пост')
+        cls.popular = Post.objects.create(
+            author=cls.user, text='Обсуждаемый пост')
+        cls.stale = Post.objects.create(author=cls.user, text='Старый пост')
+        Post.objects.filter(pk=cls.popular.pk).update(comment_count=10)
+        Post.objects.filter(pk=cls.stale.pk).update(
+            comment_count=100,
+            pub_date=timezone.now() - trending.WINDOW * 2)
+
+    def setUp(self):
+        trending.rank()
+        cache.clear()
+
+    def get_page(self, **params):
+        response = self.client.get(reverse('posts:trending'), params)
+        return response.context['page_obj']
+
+    def test_comments_raise_and_window_limits(self):
+        self.assertEqual(list(self.get_page()), [self.popular, self.quiet])
+
+    def test_age_decays_score(self):
+        Post.objects.filter(pk=self.popular.pk).update(
+            pub_date=timezone.now() - timezone.timedelta(days=3))
+        trending.rank()
+        cache.clear()
+        self.assertEqual(list(self.get_page()), [self.quiet, self.popular])
+
+    def test_unfinished_ranking_not_served(self):
+        """Пока пересчёт пишется, страница читает прошлое поколение"""
+        ranking = TrendingRanking.objects.create()
+        TrendingScore.objects.create(
+            generation=ranking.pk, post=self.stale, score=100)
+        self.assertEqual(list(self.get_page()), [self.popular, self.quiet])
+        trending.rank()
+        self.assertEqual(set(TrendingScore.objects.values_list(
+            'generation', flat=True)), {trending.current_generation()})
+
+    @override_settings(COUNT_POST=1)
+    def test_cursor_pages(self):
+        first = self.get_page()
+        second = self.get_page(cursor=first.next_cursor)
+        self.assertEqual(list(first) + list(second),
+                         [self.popular, self.quiet])
+        self.assertIsNone(second.next_cursor)
+        back = self.get_page(cursor=second.previous_cursor)
+        self.assertEqual(list(back), [self.popular])
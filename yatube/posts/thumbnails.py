@@ -0,0 +1,95 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Раньше {% thumbnail %} декодировал и ужимал исходник прямо во время
+первого показа поста. Теперь миниатюра строится в пуле потоков после
+сохранения поста, а её адрес пишется в Post.thumbnail; шаблоны только
+читают готовый адрес.
+
+Кроме основной миниатюры строятся варианты разной ширины в WebP
+(если Pillow собран с libwebp) и JPEG; их манифест хранится
+в Post.image_variants и выводится тегом {% post_image %} как srcset.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from PIL import features
+from sorl.thumbnail import get_thumbnail
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+VARIANT_WIDTHS = (320, 640, 960, 1920)
+VARIANT_FORMATS = ('WEBP', 'JPEG')
+VARIANT_ASPECT = 339 / 960
+VARIANT_QUALITY = 80
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails')
+
+
+def has_source(post):
+    return bool(post.image) and post.image.storage.exists(post.image.name)
+
+
+def variant_formats():
+    return [fmt for fmt in VARIANT_FORMATS
+            if fmt != 'WEBP' or features.check('webp')]
+
+
+def build_variants(image):
+    """Манифест вариантов: {'webp': [[url, ширина], ...], 'jpeg': ...}."""
+    manifest = {}
+    for fmt in variant_formats():
+        variants = {}
+        for width in VARIANT_WIDTHS:
+            geometry = f'{width}x{round(width * VARIANT_ASPECT)}'
+            variant = get_thumbnail(image, geometry, crop='center',
+                                    format=fmt, quality=VARIANT_QUALITY)
+            # Без увеличения узкий исходник даёт одинаковые варианты.
+            variants.setdefault(variant.width, variant.url)
+        manifest[fmt.lower()] = [[url, width]
+                                 for width, url in sorted(variants.items())]
+    return manifest
+
+
+def generate(post_id):
+    """Строит миниатюру и варианты картинки поста, сохраняет адреса."""
+    post = (Post.objects
+            .select_related('author')
+            .only('image', 'group', 'author__username')
+            .get(pk=post_id))
+    thumbnail = get_thumbnail(
+        post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+    manifest = build_variants(post.image)
+    updated = (Post.objects
+               .filter(pk=post_id, image=post.image.name)
+               .update(thumbnail=thumbnail.url,
+                       image_variants=json.dumps(manifest)))
+    if updated:
+        caching.post_changed(post, {post.group_id})
+    return thumbnail.url
+
+
+def generate_in_background(post_id):
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру поста %s', post_id)
+    finally:
+        connections.close_all()
+
+
+def schedule(post):
+    """Ставит миниатюру поста в очередь после фиксации транзакции."""
+    if not has_source(post):
+        return
+    transaction.on_commit(
+        lambda: executor.submit(generate_in_background, post.pk))
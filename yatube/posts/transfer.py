@@ -0,0 +1,75 @@
+"""Форматы переноса постов для import_posts и export_posts.
+
+Запись — словарь с полями FIELDS: автор задаётся username, группа —
+slug, картинка — путь в хранилище (как в Post.image). Оба формата
+читаются и пишутся потоково, по одной записи.
+"""
+import csv
+import json
+import time
+
+FIELDS = ('id', 'author', 'group', 'text', 'pub_date', 'image')
+FORMATS = ('ndjson', 'csv')
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+def post_records(queryset, chunk_size):
+    """Посты queryset как записи; в памяти не больше chunk_size строк."""
+    rows = (queryset
+            .order_by('pk')
+            .values_list('pk', 'author__username', 'group__slug', 'text',
+                         'pub_date', 'image')
+            .iterator(chunk_size=chunk_size))
+    for pk, author, group, text, pub_date, image in rows:
+        yield {'id': pk, 'author': author, 'group': group or '',
+               'text': text, 'pub_date': pub_date.isoformat(),
+               'image': image or ''}
+
+
+def write_records(records, file, fmt):
+    """Пишет записи в file, по мере чтения; отдаёт их счёт."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(record):
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    for count, record in enumerate(records, 1):
+        write(record)
+        yield count
+
+
+def read_records(file, fmt):
+    """Записи из file по одной; пустые строки NDJSON пропускаются,
+    а на месте неразборчивых отдаётся None."""
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+class Throughput:
+    """Счётчик записей в секунду для отчёта команд."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+
+    def add(self, count):
+        self.count += count
+
+    def __str__(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.count / elapsed if elapsed else 0
+        return f'{self.count} записей за {elapsed:.1f} с ({rate:.0f}/с)'
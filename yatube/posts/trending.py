@@ -0,0 +1,123 @@
+"""Рейтинг «Популярное».
+
+Счёт поста растёт с комментариями и подписчиками автора и падает
+с возрастом, как у Hacker News:
+
+    (1 + COMMENT_WEIGHT * комментарии
+       + FOLLOWER_WEIGHT * ln(1 + подписчики)) / (часы + 2) ** GRAVITY
+
+Считать это в запросе страницы дорого, поэтому rank() периодически
+(manage.py rank_trending) проходит по постам за WINDOW пачками,
+читая только готовые счётчики (Post.comment_count, UserStats), и
+пишет новое поколение TrendingScore. Страница листается курсором
+по (score, id) внутри последнего законченного поколения.
+"""
+import math
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.sqlite import run_serialized
+
+from . import caching
+from .models import Post, TrendingRanking, TrendingScore
+from .utils import CursorPaginator, batches, keyset, parse_score
+
+COMMENT_WEIGHT = 3.0
+FOLLOWER_WEIGHT = 1.0
+GRAVITY = 1.5
+WINDOW = timezone.timedelta(days=7)
+
+
+def score_batch(rows, now):
+    """Счета пачки строк (pk, комментарии, подписчики, pub_date)."""
+    log1p, timestamp = math.log1p, now.timestamp()
+    return [
+        (pk, (1 + COMMENT_WEIGHT * comments
+              + FOLLOWER_WEIGHT * log1p(followers or 0))
+         / ((timestamp - pub_date.timestamp()) / 3600 + 2) ** GRAVITY)
+        for pk, comments, followers, pub_date in rows]
+
+
+def write(func):
+    """Короткая транзакция записи; на SQLite в режиме SQLITE_TUNING —
+    через очередь писателей с повтором."""
+    if settings.SQLITE_TUNING:
+        return run_serialized(func)
+    with transaction.atomic():
+        return func()
+
+
+def current_generation():
+    """Поколение последнего законченного пересчёта или None."""
+    return (TrendingRanking.objects
+            .filter(finished__isnull=False)
+            .order_by('-pk')
+            .values_list('pk', flat=True)
+            .first())
+
+
+def rank(now=None, batch_size=5000):
+    """Пересчитывает рейтинг; возвращает число постов в нём.
+
+    Новое поколение пишется рядом со старым, каждая пачка — своей
+    транзакцией, поэтому единственный писатель SQLite занят только на
+    время пачки. Страница переключается на новое поколение, когда
+    пересчёт отмечен законченным; старые строки удаляются пачками.
+    """
+    now = now or timezone.now()
+    ranking = write(lambda: TrendingRanking.objects.create())
+    table = connection.ops.quote_name(TrendingScore._meta.db_table)
+    # Пачка пишется одним executemany: bulk_create на миллионе строк
+    # тратит большую часть времени на объекты моделей и сборку SQL.
+    insert = (f'INSERT INTO {table} (generation, post_id, score) '
+              f'VALUES ({ranking.pk}, %s, %s)')
+
+    def insert_batch(scores):
+        with connection.cursor() as cursor:
+            cursor.executemany(insert, scores)
+
+    last_pk = 0
+    total = 0
+    while True:
+        batch = list(Post.objects
+                     .filter(pub_date__gte=now - WINDOW, pk__gt=last_pk)
+                     .order_by('pk')
+                     .values_list('pk', 'comment_count',
+                                  'author__stats__followers_count',
+                                  'pub_date')[:batch_size])
+        if not batch:
+            break
+        scores = score_batch(batch, now)
+        write(lambda: insert_batch(scores))
+        last_pk = batch[-1][0]
+        total += len(batch)
+    ranking.finished = timezone.now()
+    write(lambda: ranking.save(update_fields=['finished']))
+    caching.bump([caching.trending_scope()])
+    stale = TrendingScore.objects.filter(generation__lt=ranking.pk)
+    for pks in batches(stale, batch_size):
+        write(lambda: TrendingScore.objects.filter(pk__in=pks).delete())
+    write(lambda: TrendingRanking.objects.filter(pk__lt=ranking.pk).delete())
+    return total
+
+
+class TrendingPaginator(CursorPaginator):
+    """Курсорная выдача рейтинга: сначала посты с большим счётом."""
+
+    date_field = 'trending_score'
+    parse_key = staticmethod(parse_score)
+
+    def fetch(self, cursor, limit):
+        scores = TrendingScore.objects.filter(
+            generation=current_generation())
+        rows = list(keyset(scores, cursor, 'score', 'post')
+                    .values_list('post', 'score')[:limit])
+        posts = self.object_list.in_bulk([pk for pk, _ in rows])
+        found = []
+        for pk, score in rows:
+            if pk in posts:
+                posts[pk].trending_score = score
+                found.append(posts[pk])
+        return found
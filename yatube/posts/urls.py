@@ -8,11 +8,20 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/all/', views.group_all, name='group_all'),
+    path('profile/<str:username>/all/', views.profile_all,
+         name='profile_all'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('trending/', views.trending, name='trending'),
+    path('search/', views.search, name='search'),
+    path('fragments/follow/<str:username>/', views.follow_fragment,
+         name='follow_fragment'),
+    path('fragments/post/<int:post_id>/', views.post_tools_fragment,
+         name='post_tools_fragment'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,9 +1,156 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import math
+from contextlib import contextmanager
+
 from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+def encode_cursor(obj, direction, date_field='pub_date'):
+    """Упаковывает ключ (дата или число, id) объекта в непрозрачный токен."""
+    key = getattr(obj, date_field)
+    key = key.isoformat() if hasattr(key, 'isoformat') else repr(key)
+    raw = f'{direction}|{key}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def parse_score(value):
+    """Числовой ключ курсора (например, релевантность поиска)."""
+    try:
+        score = float(value)
+    except ValueError:
+        return None
+    return score if math.isfinite(score) else None
+
+
+def decode_cursor(token, parse_key=parse_datetime):
+    """Распаковывает токен; для испорченного токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, key, pk = raw.split('|')
+        key = parse_key(key)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or key is None:
+        return None
+    return direction, key, pk
+
+
+def keyset(queryset, cursor, date_field='pub_date', key_field='pk'):
+    """Сортирует queryset по ключу и отбрасывает всё до курсора."""
+    queryset = queryset.order_by(f'-{date_field}', f'-{key_field}')
+    if cursor is None:
+        return queryset
+    direction, pub_date, pk = cursor
+    if direction == CURSOR_NEXT:
+        return queryset.filter(**{f'{date_field}__lte': pub_date}).exclude(
+            **{date_field: pub_date, f'{key_field}__gte': pk})
+    return queryset.filter(**{f'{date_field}__gte': pub_date}).exclude(
+        **{date_field: pub_date, f'{key_field}__lte': pk}).reverse()
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (pub_date, id).
+
+    В отличие от Paginator.get_page() не выполняет ни COUNT(*),
+    ни OFFSET: страница выбирается условием по ключу последнего
+    показанного поста, поэтому глубокие страницы отдаются так же
+    быстро, как первая. Метод page() оставлен от Paginator.
+    """
+
+    date_field = 'pub_date'
+    parse_key = staticmethod(parse_datetime)
+
+    def get_cursor_page(self, token=None):
+        cursor = decode_cursor(token, self.parse_key) if token else None
+        direction = cursor[0] if cursor else CURSOR_NEXT
+        object_list = self.fetch(cursor, self.per_page + 1)
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == CURSOR_PREVIOUS:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        page = Page(object_list, None, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        if object_list and has_next:
+            page.next_cursor = encode_cursor(
+                object_list[-1], CURSOR_NEXT, self.date_field)
+        if object_list and has_previous:
+            page.previous_cursor = encode_cursor(
+                object_list[0], CURSOR_PREVIOUS, self.date_field)
+        return page
+
+    def fetch(self, cursor, limit):
+        """Первые limit постов после курсора в порядке обхода."""
+        return list(keyset(self.object_list, cursor,
+                           self.date_field)[:limit])
+
+
+class CommentPaginator(CursorPaginator):
+    """Курсорная подгрузка комментариев поста, новые сверху."""
+
+    date_field = 'created'
 
 
 def get_paginator(post, request):
-    paginator = Paginator(post, settings.COUNT_POST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(post, settings.COUNT_POST)
+    page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
     return page_obj
+
+
+def get_comments_page(post_id, request):
+    comments = (
+        Comment.objects
+        .filter(post_id=post_id)
+        .select_related('author')
+        .order_by('-created', '-pk'))
+    paginator = CommentPaginator(comments, settings.COUNT_COMMENTS)
+    return paginator.get_cursor_page(request.GET.get('comments'))
+
+
+def batches(queryset, batch_size):
+    """Первичные ключи queryset пачками по batch_size.
+
+    Каждая пачка — отдельный запрос по диапазону pk, а не курсор
+    на всю выборку: его можно читать и между транзакциями (на
+    PostgreSQL серверный курсор iterator() закрывается при COMMIT).
+    """
+    last_pk = 0
+    while True:
+        pks = list(queryset
+                   .filter(pk__gt=last_pk)
+                   .order_by('pk')
+                   .values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now_add у fields, чтобы bulk_create сохранил
+    заданные даты, а не текущее время.
+
+    Поле меняется для всего процесса: только для management-команд.
+    """
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in saved:
+            field.auto_now_add = auto_now_add
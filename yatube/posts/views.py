@@ -1,18 +1,74 @@
+from django.conf import settings
 from django.shortcuts import redirect, render, get_object_or_404
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
-from django.views.decorators.cache import cache_page
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
 
-from .utils import get_paginator
+from core.concurrency import gather
+from core.db import replica_reads
+from core.edge import edge_shell
+
+from .caching import (
+    author_scope, cache_feed, comments_scope, feed_etag, follow_feed_scopes,
+    get_version, group_scope, index_scope, replica_may_lag, trending_scope)
+from .feed import FeedPaginator, get_follow_feed
+from .follows import following_ids
+from .groups import get_group_or_404
+from .search import SearchPaginator
+from .streaming import stream_posts
+from .trending import TrendingPaginator
+from .utils import get_comments_page, get_paginator
 from .forms import CommentForm, PostForm
-from .models import Group, Post, Comment, Follow
+from .models import Post, Follow
 
 
 User = get_user_model()
 
 
-@cache_page(20)
+def index_scopes(request):
+    return [index_scope()]
+
+
+def group_scopes(request, slug):
+    return [group_scope(slug)]
+
+
+def profile_scopes(request, username):
+    return [author_scope(username)]
+
+
+def follow_scopes(request):
+    return follow_feed_scopes(request.user.pk, following_ids(request))
+
+
+def trending_scopes(request):
+    """Рейтинг меняет rank_trending, а текст и картинки постов —
+    правки, которые сбрасывают общую ленту."""
+    return [trending_scope(), index_scope()]
+
+
+def post_scopes(request, post_id):
+    """Ленты, от которых зависит страница поста: автор (текст, счётчики,
+    подписчики), группа и комментарии. None — поста нет."""
+    if not hasattr(request, 'post_scopes'):
+        row = Post.objects.filter(pk=post_id).values_list(
+            'author__username', 'group__slug').first()
+        request.post_scopes = None
+        if row is not None:
+            username, slug = row
+            request.post_scopes = [
+                author_scope(username), comments_scope(post_id)]
+            if slug:
+                request.post_scopes.append(group_scope(slug))
+    return request.post_scopes
+
+
+@edge_shell
+@condition(etag_func=feed_etag('index', index_scopes))
+@cache_feed('index', index_scopes)
+@replica_reads(unless=replica_may_lag(index_scopes))
 def index(request):
     title = 'Последние обновления на сайте'
     posts = Post.objects.select_related('group', 'author')
@@ -26,8 +82,12 @@ def index(request):
     return render(request, template_path, context)
 
 
+@edge_shell
+@condition(etag_func=feed_etag('group', group_scopes))
+@cache_feed('group', group_scopes)
+@replica_reads(unless=replica_may_lag(group_scopes))
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = get_group_or_404(slug)
     posts = (
         group
         .posts
@@ -42,39 +102,111 @@ def group_posts(request, slug):
     return render(request, template_path, context)
 
 
+@edge_shell
+@condition(etag_func=feed_etag('profile', profile_scopes))
+@cache_feed('profile', profile_scopes)
+@replica_reads(unless=replica_may_lag(profile_scopes))
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
     author_posts = (
-        author
-        .posts
+        Post.objects
+        .filter(author__username=username)
         .select_related('group'))
-    page_obj = get_paginator(author_posts, request)
+    # Автор, подписки читателя и страница постов друг от друга не
+    # зависят и читаются параллельно.
+    author, _, page_obj = gather(
+        lambda: get_object_or_404(
+            User.objects.select_related('stats'), username=username),
+        lambda: following_ids(request),
+        lambda: get_paginator(author_posts, request))
     template_path = 'posts/profile.html'
     context = {'author': author,
                'page_obj': page_obj}
-    if request.user.is_authenticated:
-        follow = Follow.objects.filter(author=author, user=request.user)
-        following = follow.exists()
-        context['following'] = following
     return render(request, template_path, context)
 
 
+@condition(etag_func=feed_etag('group_all', group_scopes))
+def group_all(request, slug):
+    group = get_group_or_404(slug)
+    posts = group.posts.select_related('author')
+    context = {'title': f'Все записи сообщества {group.title}'}
+    return stream_posts(request, 'posts/all_posts.html', context, posts)
+
+
+@condition(etag_func=feed_etag('profile_all', profile_scopes))
+def profile_all(request, username):
+    author = get_object_or_404(User, username=username)
+    posts = author.posts.select_related('author')
+    context = {'title': f'Все записи пользователя {author.get_full_name()}'}
+    return stream_posts(request, 'posts/all_posts.html', context, posts)
+
+
+@edge_shell
+@condition(etag_func=feed_etag('trending', trending_scopes))
+@cache_feed('trending', trending_scopes)
+@replica_reads(unless=replica_may_lag(trending_scopes))
+def trending(request):
+    posts = Post.objects.select_related('group', 'author')
+    paginator = TrendingPaginator(posts, settings.COUNT_POST)
+    page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+        'title': 'Популярные записи'}
+    template_path = 'posts/trending.html'
+    return render(request, template_path, context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = Post.objects.select_related('group', 'author')
+    paginator = SearchPaginator(query, posts, settings.COUNT_POST)
+    page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'title': 'Поиск по записям'}
+    template_path = 'posts/search.html'
+    return render(request, template_path, context)
+
+
+@edge_shell
+@condition(etag_func=feed_etag('post', post_scopes, forms=True))
+@replica_reads(unless=replica_may_lag(post_scopes))
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post, comments = gather(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author__stats', 'group'),
+            id=post_id),
+        lambda: get_comments_page(post_id, request))
     template_path = 'posts/post_detail.html'
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.select_related('post')
     context = {'post': post,
                'form': form,
-               'comments': comments}
+               'comments': comments,
+               'comments_version': get_version([comments_scope(post.id)])}
     return render(request, template_path, context)
 
 
+@never_cache
+def follow_fragment(request, username):
+    """Кнопка подписки для публичной оболочки профиля (core.edge)."""
+    author = get_object_or_404(User, username=username)
+    context = {'author': author}
+    return render(request, 'posts/includes/follow_button.html', context)
+
+
+@never_cache
+def post_tools_fragment(request, post_id):
+    """Кнопка правки и форма комментария для оболочки поста."""
+    post = get_object_or_404(Post.objects.only('author_id'), id=post_id)
+    context = {'post': post, 'form': CommentForm()}
+    return render(request, 'posts/includes/post_tools.html', context)
+
+
 @login_required
 def post_create(request):
     template_path = 'posts/create_post.html'
     title = 'Cоздание записи'
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         user = request.user
         post = form.save(commit=False)
@@ -120,10 +252,16 @@ def add_comment(request, post_id):
 
 
 @login_required
+@condition(etag_func=feed_etag('follow', follow_scopes))
+@cache_feed('follow', follow_scopes)
+@replica_reads(unless=replica_may_lag(follow_scopes))
 def follow_index(request):
     title = 'Авторы, на которых вы подписаны'
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_paginator(posts, request)
+    posts = (
+        get_follow_feed(request.user)
+        .select_related('author', 'group'))
+    paginator = FeedPaginator(request.user, posts, settings.COUNT_POST)
+    page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
     context = {
         'page_obj': page_obj,
         'title': title,
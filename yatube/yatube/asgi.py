@@ -0,0 +1,18 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``
+(for example, ``uvicorn yatube.asgi:application``). Django 2.2 has no ASGI
+support of its own, so requests run through core.asgi.AsgiHandler on a
+bounded thread pool.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import AsgiHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = AsgiHandler(get_wsgi_application())
@@ -47,10 +47,13 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.db.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,6 +86,14 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Потоки, в которых yatube.asgi выполняет запросы (core.asgi).
+ASGI_THREADS = int(os.getenv('YATUBE_ASGI_THREADS', '8'))
+# Сколько кусков ответа ждут медленного клиента, не занимая поток.
+ASGI_BUFFER_CHUNKS = int(os.getenv('YATUBE_ASGI_BUFFER_CHUNKS', '16'))
+# Независимые запросы к БД внутри profile и post_detail идут
+# параллельно в пуле из FETCH_THREADS потоков (core.concurrency).
+CONCURRENT_FETCHES = os.getenv('YATUBE_CONCURRENT_FETCHES', '1') == '1'
+FETCH_THREADS = int(os.getenv('YATUBE_FETCH_THREADS', '16'))
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 # Database
@@ -92,9 +103,64 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('YATUBE_CONN_MAX_AGE', '0')),
     }
 }
 
+# Пул соединений (core.pool): YATUBE_DB_POOL=1 подменяет бэкенд на
+# core.backends.pooled_sqlite3 (для PostgreSQL есть pooled_postgresql).
+# Соединение берётся из пула в начале запроса и возвращается в конце;
+# метрики пула — на /debug/db-pools/ для персонала.
+if os.getenv('YATUBE_DB_POOL'):
+    DATABASES['default'].update({
+        'ENGINE': 'core.backends.pooled_sqlite3',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MIN_SIZE': 2,
+            'MAX_SIZE': 20,
+            'TIMEOUT': 5,
+            'MAX_IDLE': 300,
+            'HEALTH_CHECK_AFTER': 30,
+        },
+    })
+
+# Режим SQLite для рабочих шардов (core.sqlite): YATUBE_SQLITE_TUNING=1
+# включает WAL и прагмы ниже на каждом соединении, а транзакции
+# бэкенда core.backends.sqlite3 идут по одной (BEGIN IMMEDIATE).
+SQLITE_TUNING = bool(os.getenv('YATUBE_SQLITE_TUNING'))
+if (SQLITE_TUNING and DATABASES['default']['ENGINE']
+        == 'django.db.backends.sqlite3'):
+    DATABASES['default']['ENGINE'] = 'core.backends.sqlite3'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+    'busy_timeout': 5000,
+}
+SQLITE_WRITE_RETRIES = 5
+SQLITE_WRITE_BACKOFF = 0.05
+
+# Реплики только для чтения (core.db.ReplicaRouter): пути к копиям БД
+# через запятую в YATUBE_REPLICAS. Ленты и страницы постов читаются
+# с них; после записи пользователь REPLICA_PIN_SECONDS читает
+# с основной. Пока лента менялась меньше REPLICA_MAX_LAG секунд назад,
+# её страницы строятся по основной БД, чтобы не закешировать отставшую
+# копию.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.getenv('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+REPLICA_MAX_LAG = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -129,6 +195,7 @@ USE_L10N = True
 USE_TZ = True
 
 COUNT_POST = 10
+COUNT_COMMENTS = 20
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -143,8 +210,79 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Потоки, в которых после сохранения поста строятся миниатюры.
+THUMBNAIL_WORKERS = 2
+
+# Страницы лент кешируются надолго: при изменениях их сбрасывает
+# смена поколения (posts.caching).
+FEED_CACHE_TIMEOUT = 60 * 60 * 4
+# Подписки пользователя в кеше (posts.follows); сбрасываются сразу,
+# время жизни — страховка от записей в обход сигналов.
+FOLLOWING_CACHE_TIMEOUT = 60 * 10
+# Сколько сообществ держать в памяти процесса (posts.groups).
+GROUP_CACHE_SIZE = 1000
+
+# L1 — LRU в памяти процесса перед общим для воркеров кешем L2
+# (core.cache.TieredCache). L2 выбирается переменной окружения
+# YATUBE_SHARED_CACHE: local (по умолчанию, одна машина и тесты),
+# file или redis (нужен пакет django-redis).
+SHARED_CACHES = {
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+    },
+}
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'local',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_TIMEOUT': 5,
+            'LOCAL_MAX_ENTRIES': 1000,
+        },
+    },
+    'shared': SHARED_CACHES[os.getenv('YATUBE_SHARED_CACHE', 'local')],
 }
+
+# Лента подписок: авторы, у которых подписчиков больше FEED_FANOUT_LIMIT,
+# не раскладываются по лентам при публикации, а читаются на лету.
+FEED_FANOUT_LIMIT = 1000
+# Сколько последних постов автора попадает в ленту при подписке.
+FEED_BACKFILL_SIZE = 1000
+
+# Фоновые задачи (core.tasks). По умолчанию (разработка и тесты) они
+# выполняются сразу в запросе, и раскладка, индекс и счётчики остаются
+# на пути записи. В продакшене нужен YATUBE_TASKS=queue: задачи ставятся
+# в очередь для manage.py run_worker.
+TASKS_EAGER = os.getenv('YATUBE_TASKS') != 'queue'
+TASKS_MAX_ATTEMPTS = 5
+# Задержка перед повтором, с; удваивается с каждой попыткой.
+TASKS_RETRY_DELAY = 10
+# Через сколько секунд задача упавшего воркера возвращается в очередь.
+TASKS_TIMEOUT = 600
+# Сколько секунд хранятся выполненные задачи (и действуют их ключи).
+TASKS_KEEP_DONE = 60 * 60 * 24
+
+# Публичные оболочки лент для фронт-прокси с ESI (core.edge):
+# пользовательские куски страниц грузятся отдельными запросами.
+# Включается YATUBE_EDGE_CACHE=1; прокси должен поддерживать ESI.
+EDGE_CACHE_ENABLED = os.getenv('YATUBE_EDGE_CACHE') == '1'
+EDGE_CACHE_TIMEOUT = 60
+
+# Профилирование запросов (core.profiling): Server-Timing и лог
+# для manage.py profiling_report. Включается YATUBE_PROFILING=1,
+# пик памяти (tracemalloc, заметно медленнее) — ещё и
+# YATUBE_PROFILING_MEMORY=1.
+PROFILING_ENABLED = os.getenv('YATUBE_PROFILING') == '1'
+PROFILING_LOG = os.path.join(BASE_DIR, 'profiling.ndjson')
+PROFILING_TRACE_MEMORY = os.getenv('YATUBE_PROFILING_MEMORY') == '1'